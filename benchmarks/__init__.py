@@ -0,0 +1,4 @@
+"""Benchmarks comparing picklable_itertools with the standard library.
+
+Run with ``python -m benchmarks.run``; see :mod:`benchmarks.run`.
+"""
@@ -0,0 +1,455 @@
+"""Benchmark cases.
+
+Throughput cases pair a factory for one of our iterators with a factory
+for its standard library (or plain Python) equivalent. Both take the
+number of items `n` the iterator should produce.
+
+Pickle cases build an iterator in some partially consumed state, e.g. at
+the top of a pipeline of a given depth or with a buffer of a given fill,
+to measure the cost and size of checkpointing it.
+"""
+import atexit
+import bisect
+import collections
+from collections import namedtuple
+import heapq
+import itertools
+from operator import add
+import os
+import random
+import shutil
+import tempfile
+
+import six
+from six.moves import cPickle
+
+from picklable_itertools import (
+    ifilter, ifilterfalse, takewhile, dropwhile, groupby, iter_,
+    ordered_sequence_iterator, file_iterator, range_iterator, imap, starmap,
+    izip, izip_longest, permutations, combinations,
+    combinations_with_replacement, accumulate, chain, compress, count, cycle,
+    repeat, islice, tee, product, xrange, permuted_xrange
+)
+from picklable_itertools.extras import (
+    partition, partition_all, equizip, interleave, roundrobin, shuffle, shard,
+    collate, mix, merge, sliding_window, fuse, bucket_by, external_sorted,
+    merge_join, unique, reservoir_sample, cache
+)
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
+
+ThroughputCase = namedtuple('ThroughputCase', ['name', 'factory',
+                                               'reference'])
+PickleCase = namedtuple('PickleCase', ['name', 'factory'])
+
+THROUGHPUT_CASES = []
+PICKLE_CASES = []
+
+
+def throughput(name, factory, reference=None):
+    THROUGHPUT_CASES.append(ThroughputCase(name, factory, reference))
+
+
+def pickle_case(name, factory):
+    PICKLE_CASES.append(PickleCase(name, factory))
+
+
+def _inc(x):
+    return x + 1
+
+
+def _is_odd(x):
+    return x % 2
+
+
+def _below(limit):
+    return lambda x: x < limit
+
+
+def _quarter(x):
+    return x // 4
+
+
+def _consumed(it, n):
+    """Advance `it` by `n` items and return it."""
+    for _ in six.moves.xrange(n):
+        next(it)
+    return it
+
+
+def _partition_reference(size, seq, pad=None):
+    return six.moves.zip_longest(*[iter(seq)] * size, fillvalue=pad)
+
+
+def _map_filter_map(n):
+    return imap(_inc, ifilter(_is_odd, imap(_inc, xrange(n))))
+
+
+def _map_filter_map_reference(n):
+    return six.moves.map(_inc, six.moves.filter(
+        _is_odd, six.moves.map(_inc, range(n))))
+
+
+def _window_reference(size, seq):
+    window = collections.deque(maxlen=size)
+    for value in seq:
+        window.append(value)
+        if len(window) == size:
+            yield tuple(window)
+
+
+def _roundrobin_reference(*iterables):
+    pending = [iter(it) for it in iterables]
+    while pending:
+        remaining = []
+        for it in pending:
+            try:
+                yield next(it)
+            except StopIteration:
+                continue
+            remaining.append(it)
+        pending = remaining
+
+
+def _shuffled_reference(n, seed=0):
+    values = list(_list(n))
+    random.Random(seed).shuffle(values)
+    return iter(values)
+
+
+def _mixed_reference(n, seed=0):
+    """Draw from 4 streams with weights 4:3:2:1, one random() call each."""
+    rng = random.Random(seed)
+    sources = [iter(range(n)) for _ in range(4)]
+    cdf = [0.4, 0.7, 0.9, 1.0]
+    while True:
+        yield next(sources[bisect.bisect_right(cdf, rng.random())])
+
+
+def _bucket_reference(seq, key, boundaries, size):
+    buckets = [[] for _ in range(len(boundaries) + 1)]
+    for value in seq:
+        bucket = buckets[bisect.bisect_right(boundaries, key(value))]
+        bucket.append(value)
+        if len(bucket) == size:
+            yield tuple(bucket)
+            del bucket[:]
+    for bucket in buckets:
+        if bucket:
+            yield tuple(bucket)
+
+
+def _merge_join_reference(left, right):
+    """Join two sorted iterables of distinct keys."""
+    left, right = iter(left), iter(right)
+    try:
+        a, b = next(left), next(right)
+        while True:
+            if a < b:
+                a = next(left)
+            elif b < a:
+                b = next(right)
+            else:
+                yield a, b
+                a, b = next(left), next(right)
+    except StopIteration:
+        return
+
+
+def _unique_reference(seq):
+    seen = set()
+    for value in seq:
+        if value not in seen:
+            seen.add(value)
+            yield value
+
+
+def _reservoir_reference(seq, k, seed=0):
+    """Algorithm R: one random number for every element past the first k.
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    for i, value in enumerate(seq):
+        if i < k:
+            reservoir.append(value)
+        else:
+            j = rng.randint(0, i)
+            if j < k:
+                reservoir[j] = value
+    return iter(reservoir)
+
+
+def _written_reference(seq):
+    """Pickle every element to a file as it is returned."""
+    with open(_scratch_path(), 'wb') as f:
+        for value in seq:
+            cPickle.dump(value, f, cPickle.HIGHEST_PROTOCOL)
+            yield value
+
+
+def _unpickled_reference(n):
+    """Unpickle `n` integers from a list of their pickles."""
+    if n not in _PICKLES:
+        _PICKLES[n] = [cPickle.dumps(i, cPickle.HIGHEST_PROTOCOL)
+                       for i in range(n)]
+    return six.moves.map(cPickle.loads, _PICKLES[n])
+
+
+_LISTS = {}
+_ROWS = {}
+_TEXT_FILES = {}
+_CACHES = {}
+_PICKLES = {}
+_SCRATCH_DIRS = []
+_SCRATCH_NAMES = itertools.count()
+
+
+def _list(n, pairs=False):
+    """Return a shared list of `n` integers (or of pairs of integers)."""
+    if (n, pairs) not in _LISTS:
+        _LISTS[n, pairs] = (list(zip(range(n), range(n))) if pairs
+                            else list(range(n)))
+    return _LISTS[n, pairs]
+
+
+def _singletons(n):
+    return [ordered_sequence_iterator([i]) for i in six.moves.xrange(n)]
+
+
+def _rows(n):
+    """Return a shared list of `n` small NumPy arrays."""
+    if n not in _ROWS:
+        _ROWS[n] = list(numpy.ones((n, 8)))
+    return _ROWS[n]
+
+
+def _sorted_lists(n, k, runs=False):
+    """Return `k` shared sorted lists of `n // k` integers each, either
+    interleaved at random or in disjoint consecutive runs."""
+    if (n, k, runs) not in _LISTS:
+        if runs:
+            lists = [list(range(i * (n // k), (i + 1) * (n // k)))
+                     for i in range(k)]
+        else:
+            rng = random.Random(0)
+            lists = [sorted(rng.randrange(n) for _ in range(n // k))
+                     for _ in range(k)]
+        _LISTS[n, k, runs] = lists
+    return _LISTS[n, k, runs]
+
+
+def _text_file(n):
+    """Open a file of `n` lines, written the first time it is requested."""
+    if n not in _TEXT_FILES:
+        _TEXT_FILES[n] = tempfile.NamedTemporaryFile(mode='w')
+        _TEXT_FILES[n].write('x\n' * n)
+        _TEXT_FILES[n].flush()
+    return open(_TEXT_FILES[n].name)
+
+
+def _scratch_path():
+    """Return a new path in a temporary directory removed at exit."""
+    if not _SCRATCH_DIRS:
+        _SCRATCH_DIRS.append(tempfile.mkdtemp(prefix='benchmarks_'))
+        atexit.register(shutil.rmtree, _SCRATCH_DIRS[0], True)
+    return os.path.join(_SCRATCH_DIRS[0], str(next(_SCRATCH_NAMES)))
+
+
+def _cache_path(n):
+    """Return the path of a complete cache of `n` integers, written the
+    first time it is requested."""
+    if n not in _CACHES:
+        _CACHES[n] = _scratch_path()
+        collections.deque(cache(xrange(n), _CACHES[n]), maxlen=0)
+    return _CACHES[n]
+
+
+# Iteration over built-in types.
+throughput('iter_', lambda n: iter_(_list(n)), lambda n: iter(_list(n)))
+throughput('ordered_sequence_iterator',
+           lambda n: ordered_sequence_iterator(_list(n)),
+           lambda n: iter(_list(n)))
+throughput('range_iterator', lambda n: range_iterator(six.moves.xrange(n)),
+           lambda n: iter(six.moves.xrange(n)))
+throughput('file_iterator', lambda n: file_iterator(_text_file(n)),
+           lambda n: iter(_text_file(n)))
+throughput('xrange', lambda n: iter(xrange(n)),
+           lambda n: iter(six.moves.xrange(n)))
+throughput('permuted_xrange', lambda n: iter(permuted_xrange(n, 0)),
+           lambda n: iter(random.Random(0).sample(range(n), n)))
+
+# The itertools equivalents.
+throughput('ifilter', lambda n: ifilter(_is_odd, xrange(2 * n)),
+           lambda n: six.moves.filter(_is_odd, range(2 * n)))
+throughput('ifilterfalse', lambda n: ifilterfalse(_is_odd, xrange(2 * n)),
+           lambda n: six.moves.filterfalse(_is_odd, range(2 * n)))
+throughput('takewhile', lambda n: takewhile(_below(n), xrange(2 * n)),
+           lambda n: itertools.takewhile(_below(n), range(2 * n)))
+throughput('dropwhile', lambda n: dropwhile(_below(n), xrange(2 * n)),
+           lambda n: itertools.dropwhile(_below(n), range(2 * n)))
+throughput('groupby', lambda n: groupby(xrange(4 * n), _quarter),
+           lambda n: itertools.groupby(range(4 * n), _quarter))
+throughput('imap', lambda n: imap(_inc, xrange(n)),
+           lambda n: six.moves.map(_inc, range(n)))
+throughput('starmap', lambda n: starmap(add, _list(n, pairs=True)),
+           lambda n: itertools.starmap(add, _list(n, pairs=True)))
+throughput('izip', lambda n: izip(xrange(n), xrange(n)),
+           lambda n: six.moves.zip(range(n), range(n)))
+throughput('izip_longest', lambda n: izip_longest(xrange(n), xrange(n // 2)),
+           lambda n: six.moves.zip_longest(range(n), range(n // 2)))
+throughput('permutations', lambda n: permutations(range(7)),
+           lambda n: itertools.permutations(range(7)))
+throughput('combinations', lambda n: combinations(range(9), 4),
+           lambda n: itertools.combinations(range(9), 4))
+throughput('combinations_with_replacement',
+           lambda n: combinations_with_replacement(range(6), 4),
+           lambda n: itertools.combinations_with_replacement(range(6), 4))
+throughput('product', lambda n: product(xrange(100), repeat=2),
+           lambda n: itertools.product(range(100), repeat=2))
+throughput('accumulate', lambda n: accumulate(xrange(n)),
+           (lambda n: itertools.accumulate(range(n)))
+           if hasattr(itertools, 'accumulate') else None)
+throughput('chain', lambda n: chain(*[xrange(10)] * (n // 10)),
+           lambda n: itertools.chain(*[range(10)] * (n // 10)))
+throughput('chain_short',
+           lambda n: chain.from_iterable(_singletons(n)),
+           lambda n: itertools.chain.from_iterable(_singletons(n)))
+throughput('compress', lambda n: compress(xrange(2 * n), cycle([0, 1])),
+           lambda n: itertools.compress(range(2 * n),
+                                        itertools.cycle([0, 1])))
+throughput('count', lambda n: count(), lambda n: itertools.count())
+throughput('cycle', lambda n: cycle(range(100)),
+           lambda n: itertools.cycle(range(100)))
+throughput('repeat', lambda n: repeat(None, n),
+           lambda n: itertools.repeat(None, n))
+throughput('islice', lambda n: islice(xrange(3 * n), 0, 3 * n, 3),
+           lambda n: itertools.islice(range(3 * n), 0, 3 * n, 3))
+throughput('tee', lambda n: tee(xrange(n))[0],
+           lambda n: itertools.tee(range(n))[0])
+
+# The same three-stage pipeline, as separate iterators and fused.
+throughput('map_filter_map',
+           lambda n: _map_filter_map(2 * n),
+           lambda n: _map_filter_map_reference(2 * n))
+throughput('fused_map_filter_map',
+           lambda n: fuse(_map_filter_map(2 * n)),
+           lambda n: _map_filter_map_reference(2 * n))
+
+# Extras.
+throughput('partition', lambda n: partition(2, xrange(2 * n)),
+           lambda n: _partition_reference(2, range(2 * n)))
+throughput('partition_all', lambda n: partition_all(2, xrange(2 * n)),
+           lambda n: _partition_reference(2, range(2 * n)))
+throughput('sliding_window', lambda n: sliding_window(8, iter(range(n))),
+           lambda n: _window_reference(8, range(n)))
+throughput('equizip', lambda n: equizip(xrange(n), xrange(n)),
+           lambda n: six.moves.zip(range(n), range(n)))
+throughput('interleave',
+           lambda n: interleave([xrange(n // 10)] * 10),
+           lambda n: _roundrobin_reference(*[range(n // 10)] * 10))
+throughput('roundrobin',
+           lambda n: roundrobin(*[xrange(n // 100)] * 100),
+           lambda n: _roundrobin_reference(*[range(n // 100)] * 100))
+throughput('shuffle', lambda n: shuffle(xrange(n), n, 0),
+           _shuffled_reference)
+throughput('mix', lambda n: mix([xrange(n)] * 4, [4, 3, 2, 1], seed=0),
+           _mixed_reference)
+throughput('merge', lambda n: merge(*_sorted_lists(n, 16)),
+           lambda n: heapq.merge(*_sorted_lists(n, 16)))
+throughput('merge_runs', lambda n: merge(*_sorted_lists(n, 16, runs=True)),
+           lambda n: heapq.merge(*_sorted_lists(n, 16, runs=True)))
+throughput('shard', lambda n: shard(_list(4 * n), 4, 1),
+           lambda n: itertools.islice(_list(4 * n), 1, None, 4))
+throughput('bucket_by',
+           lambda n: bucket_by(xrange(4 * n), _quarter, [n // 4, n // 2], 4),
+           lambda n: _bucket_reference(range(4 * n), _quarter,
+                                       [n // 4, n // 2], 4))
+throughput('external_sorted',
+           lambda n: external_sorted(_shuffled_reference(n), run_size=n // 4,
+                                     tmpdir=os.path.dirname(_scratch_path())),
+           lambda n: iter(sorted(_shuffled_reference(n))))
+throughput('merge_join',
+           lambda n: merge_join(xrange(2 * n), xrange(0, 4 * n, 2)),
+           lambda n: _merge_join_reference(range(2 * n), range(0, 4 * n, 2)))
+throughput('unique', lambda n: unique(_list(n) * 2),
+           lambda n: _unique_reference(_list(n) * 2))
+throughput('unique_lru', lambda n: unique(_list(n) * 2, mode='lru',
+                                          capacity=n),
+           lambda n: _unique_reference(_list(n) * 2))
+throughput('unique_bloom', lambda n: unique(_list(n) * 2, mode='bloom',
+                                            capacity=n, error_rate=1e-9),
+           lambda n: _unique_reference(_list(n) * 2))
+throughput('reservoir_sample',
+           lambda n: reservoir_sample(_list(100 * n), n, 0),
+           lambda n: iter(random.Random(0).sample(_list(100 * n), n)))
+throughput('reservoir_sample_stream',
+           lambda n: reservoir_sample(imap(_inc, xrange(10 * n)), n, 0),
+           lambda n: _reservoir_reference(six.moves.map(_inc, range(10 * n)),
+                                          n))
+throughput('cache_write',
+           lambda n: cache(xrange(n), _scratch_path()),
+           lambda n: _written_reference(range(n)))
+throughput('cache_replay', lambda n: cache(None, _cache_path(n)),
+           _unpickled_reference)
+
+# Vectorized variants, against the itertools equivalents on the same arrays.
+if NUMPY_AVAILABLE:
+    throughput('vectorized_imap',
+               lambda n: imap(numpy.negative, numpy.arange(n),
+                              vectorized=True),
+               lambda n: six.moves.map(numpy.negative, numpy.arange(n)))
+    throughput('vectorized_compress',
+               lambda n: compress(numpy.arange(2 * n),
+                                  numpy.arange(2 * n) % 2 == 1,
+                                  vectorized=True),
+               lambda n: itertools.compress(numpy.arange(2 * n),
+                                            numpy.arange(2 * n) % 2 == 1))
+    throughput('collate',
+               lambda n: collate(_rows(32 * n), 32, num_buffers=2),
+               lambda n: six.moves.map(
+                   numpy.stack, _partition_reference(32, _rows(32 * n))))
+    throughput('vectorized_groupby',
+               lambda n: groupby(numpy.arange(4 * n) // 4, vectorized=True),
+               lambda n: itertools.groupby(numpy.arange(4 * n) // 4))
+    throughput('sliding_window_array',
+               lambda n: sliding_window(8, numpy.arange(n)),
+               lambda n: _window_reference(8, numpy.arange(n)))
+    throughput('vectorized_accumulate',
+               lambda n: accumulate(numpy.arange(n), vectorized=True),
+               (lambda n: itertools.accumulate(numpy.arange(n)))
+               if hasattr(itertools, 'accumulate') else None)
+
+
+def _nested_imap(depth):
+    it = xrange(10 ** 6)
+    for _ in range(depth):
+        it = imap(_inc, it)
+    return _consumed(it, 10)
+
+
+def _tee_with_buffer(fill):
+    first, second = tee(xrange(10 ** 6))
+    _consumed(first, fill)
+    return second
+
+
+for depth in [1, 4, 16]:
+    pickle_case('imap_depth_{}'.format(depth),
+                lambda depth=depth: _nested_imap(depth))
+for fill in [0, 100, 10000]:
+    pickle_case('tee_fill_{}'.format(fill),
+                lambda fill=fill: _tee_with_buffer(fill))
+    pickle_case('cycle_fill_{}'.format(fill),
+                lambda fill=fill: _consumed(cycle(xrange(10 ** 6)), fill))
+    pickle_case('shuffle_fill_{}'.format(fill),
+                lambda fill=fill: _consumed(
+                    shuffle(xrange(10 ** 6), max(fill, 1), 0), 1))
+pickle_case('groupby', lambda: _consumed(groupby(xrange(10 ** 6),
+                                                 _quarter), 10))
+pickle_case('product', lambda: _consumed(product(xrange(100), repeat=3), 100))
+pickle_case('permutations', lambda: _consumed(permutations(range(8)), 100))
+pickle_case('chain_from_iterable', lambda: _consumed(
+    chain.from_iterable([xrange(10)] * 1000), 15))
+pickle_case('interleave', lambda: _consumed(
+    interleave([xrange(100)] * 100), 150))
+pickle_case('permuted_xrange', lambda: _consumed(
+    iter(permuted_xrange(10 ** 9, 0)), 10))
@@ -0,0 +1,185 @@
+"""Run the benchmarks and check them against stored thresholds.
+
+Usage::
+
+    python -m benchmarks.run [--output FILE] [--thresholds FILE]
+                             [--update-thresholds] [--quick] [--filter STR]
+
+For every throughput case, reports items per second (including the time
+taken to create the iterator) for our iterator and for its standard library
+equivalent, along with the slowdown (their ratio).
+For every pickle case, reports the time taken to pickle and unpickle the
+iterator and the size of the pickle.
+
+Results are written as JSON to `--output`. The slowdowns and pickle sizes
+are then compared with the limits in `--thresholds`, and the exit status is
+non-zero if any of them is exceeded. Absolute timings vary too much between
+machines to be checked. `--update-thresholds` rewrites the thresholds file
+from the current results, with some headroom.
+"""
+from __future__ import print_function
+import argparse
+import collections
+import itertools
+import json
+import os
+import platform
+import sys
+from timeit import default_timer
+
+from six.moves import cPickle
+
+from .cases import THROUGHPUT_CASES, PICKLE_CASES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_THRESHOLDS = os.path.join(HERE, 'thresholds.json')
+SLOWDOWN_HEADROOM = 2.5
+BYTES_HEADROOM = 1.25
+
+
+def _time_consumption(factory, n, repeats):
+    """Return (items, best seconds) for creating and consuming `factory(n)`.
+    """
+    items = sum(1 for _ in itertools.islice(factory(n), n))
+    best = float('inf')
+    for _ in range(repeats):
+        start = default_timer()
+        collections.deque(itertools.islice(factory(n), items), maxlen=0)
+        best = min(best, default_timer() - start)
+    return items, best
+
+
+def _rate(items, seconds):
+    return items / seconds if seconds > 0 else float('inf')
+
+
+def run_throughput(case, n, repeats):
+    items, seconds = _time_consumption(case.factory, n, repeats)
+    result = {'items': items, 'items_per_sec': _rate(items, seconds)}
+    if case.reference is not None:
+        ref_items, ref_seconds = _time_consumption(case.reference, n,
+                                                   repeats)
+        if ref_items != items:
+            raise AssertionError("{}: produced {} items, reference produced "
+                                 "{}".format(case.name, items, ref_items))
+        result['reference_items_per_sec'] = _rate(ref_items, ref_seconds)
+        result['slowdown'] = (result['reference_items_per_sec'] /
+                              result['items_per_sec'])
+    return result
+
+
+def run_pickle(case, repeats):
+    it = case.factory()
+    dumps_time = loads_time = float('inf')
+    for _ in range(repeats):
+        start = default_timer()
+        data = cPickle.dumps(it, cPickle.HIGHEST_PROTOCOL)
+        dumps_time = min(dumps_time, default_timer() - start)
+        start = default_timer()
+        cPickle.loads(data)
+        loads_time = min(loads_time, default_timer() - start)
+    return {'dumps_sec': dumps_time, 'loads_sec': loads_time,
+            'bytes': len(data)}
+
+
+def run(n, repeats, name_filter=None):
+    results = {'python': platform.python_version(),
+               'implementation': platform.python_implementation(),
+               'platform': platform.platform(), 'n': n,
+               'throughput': {}, 'pickle': {}}
+    for case in THROUGHPUT_CASES:
+        if name_filter is None or name_filter in case.name:
+            results['throughput'][case.name] = run_throughput(case, n,
+                                                              repeats)
+    for case in PICKLE_CASES:
+        if name_filter is None or name_filter in case.name:
+            results['pickle'][case.name] = run_pickle(case, repeats)
+    return results
+
+
+def check(results, thresholds):
+    """Return a list of messages describing exceeded thresholds."""
+    failures = []
+    for name, limit in sorted(thresholds.get('slowdown', {}).items()):
+        result = results['throughput'].get(name)
+        if result is not None and result.get('slowdown', 0) > limit:
+            failures.append("{}: {:.2f}x slower than the reference, limit "
+                            "{:.2f}x".format(name, result['slowdown'], limit))
+    for name, limit in sorted(thresholds.get('pickle_bytes', {}).items()):
+        result = results['pickle'].get(name)
+        if result is not None and result['bytes'] > limit:
+            failures.append("{}: pickle is {} bytes, limit {}".format(
+                name, result['bytes'], limit))
+    return failures
+
+
+def make_thresholds(results):
+    return {
+        'slowdown': dict(
+            (name, round(result['slowdown'] * SLOWDOWN_HEADROOM, 1))
+            for name, result in results['throughput'].items()
+            if 'slowdown' in result),
+        'pickle_bytes': dict(
+            (name, int(result['bytes'] * BYTES_HEADROOM))
+            for name, result in results['pickle'].items())}
+
+
+def report(results, out=sys.stdout):
+    print("{:<32} {:>14} {:>14} {:>9}".format(
+        'throughput', 'items/sec', 'reference', 'slowdown'), file=out)
+    for name, result in sorted(results['throughput'].items()):
+        print("{:<32} {:>14,.0f} {:>14} {:>9}".format(
+            name, result['items_per_sec'],
+            '{:,.0f}'.format(result['reference_items_per_sec'])
+            if 'slowdown' in result else '-',
+            '{:.2f}x'.format(result['slowdown'])
+            if 'slowdown' in result else '-'), file=out)
+    print(file=out)
+    print("{:<32} {:>14} {:>14} {:>9}".format(
+        'pickle', 'dumps (us)', 'loads (us)', 'bytes'), file=out)
+    for name, result in sorted(results['pickle'].items()):
+        print("{:<32} {:>14.1f} {:>14.1f} {:>9}".format(
+            name, result['dumps_sec'] * 1e6, result['loads_sec'] * 1e6,
+            result['bytes']), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="where to write the results as JSON")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS,
+                        help="JSON file of regression thresholds")
+    parser.add_argument('--update-thresholds', action='store_true',
+                        help="rewrite the thresholds from these results")
+    parser.add_argument('--quick', action='store_true',
+                        help="use fewer items and repeats")
+    parser.add_argument('--filter', default=None,
+                        help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    n, repeats = (5000, 3) if args.quick else (50000, 5)
+    results = run(n, repeats, args.filter)
+    report(results)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_thresholds:
+        thresholds = {}
+        if os.path.exists(args.thresholds):
+            with open(args.thresholds) as f:
+                thresholds = json.load(f)
+        for kind, limits in make_thresholds(results).items():
+            thresholds.setdefault(kind, {}).update(limits)
+        with open(args.thresholds, 'w') as f:
+            json.dump(thresholds, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+    with open(args.thresholds) as f:
+        failures = check(results, json.load(f))
+    for failure in failures:
+        print("REGRESSION: " + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,10 +12,12 @@ from .permutations import (
     permutations, combinations, combinations_with_replacement
 )
 from .product import product  # noqa
-from .range import xrange  # noqa
+from .range import xrange, permuted_xrange  # noqa
 from .simple import accumulate, chain, compress, count, cycle, repeat
 from .slicing import islice
 from .tee import tee
+from .backend import use_backend, get_backend
+from .instrumentation import enable_from_environment
 
 # Python 3 equivalents.
 filter = ifilter
@@ -37,10 +39,13 @@ except DistributionNotFound:
 else:
     __version__ = DIST.version
 
+enable_from_environment()
+
 
 __all__ = ['ifilter', 'ifilterfalse', 'takewhile', 'dropwhile', 'groupby',
            '_iter', 'ordered_sequence_iterator', 'file_iterator',
            'range_iterator', 'imap', 'starmap', 'izip', 'izip_longest',
            'permutations', 'combinations', 'combinations_with_replacement',
            'accumulate', 'chain', 'compress', 'count', 'cycle', 'repeat',
-           'islice', 'tee', 'filter', 'filterfalse', 'zip', 'zip_longest']
+           'islice', 'tee', 'filter', 'filterfalse', 'zip', 'zip_longest',
+           'use_backend', 'get_backend']
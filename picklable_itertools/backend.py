@@ -0,0 +1,169 @@
+"""Selection between our iterators and the standard library's.
+
+On some Python versions (CPython 3 up to 3.13) most of the iterators in
+`itertools`, as well as the builtin `map`, `filter` and `zip`, can be
+pickled. They are much faster than the pure-Python implementations in this
+package, so :func:`use_backend` can make the package hand those out
+instead. Each one is only used if it is found to pickle correctly on the
+running interpreter; everything else keeps using the pure-Python version.
+"""
+import itertools
+import warnings
+
+import six
+from six.moves import cPickle
+
+from .filter import ifilter, ifilterfalse, takewhile, dropwhile
+from .grouping import groupby
+from .map_zip import imap, starmap, izip, izip_longest
+from .permutations import (
+    permutations, combinations, combinations_with_replacement
+)
+from .product import product
+from .simple import accumulate, chain, compress, count, cycle, repeat
+from .slicing import islice
+from .tee import tee
+
+__all__ = ['use_backend', 'get_backend']
+
+BACKENDS = ('python', 'native')
+
+_PYTHON = {
+    'ifilter': ifilter, 'ifilterfalse': ifilterfalse,
+    'takewhile': takewhile, 'dropwhile': dropwhile, 'groupby': groupby,
+    'imap': imap, 'starmap': starmap, 'izip': izip,
+    'izip_longest': izip_longest, 'permutations': permutations,
+    'combinations': combinations,
+    'combinations_with_replacement': combinations_with_replacement,
+    'product': product, 'accumulate': accumulate, 'chain': chain,
+    'compress': compress, 'count': count, 'cycle': cycle, 'repeat': repeat,
+    'islice': islice, 'tee': tee
+}
+
+# Python 3 names, bound to the same objects as their Python 2 counterparts.
+_ALIASES = {'filter': 'ifilter', 'filterfalse': 'ifilterfalse',
+            'zip': 'izip', 'zip_longest': 'izip_longest'}
+
+_current = 'python'
+_native = None
+
+
+def _native_imap(function, *iterables):
+    """imap(func, *iterables) using the builtin `map` (and `zip` for None).
+    """
+    if function is None:
+        return six.moves.zip(*iterables)
+    return six.moves.map(function, *iterables)
+
+
+def _with_vectorized(native, python):
+    """Wrap `native`, deferring to `python` when given the keyword arguments
+    of its vectorized variant, which `native` does not accept."""
+    def implementation(*args, **kwargs):
+        if 'vectorized' in kwargs or 'batch_size' in kwargs:
+            return python(*args, **kwargs)
+        return native(*args, **kwargs)
+    implementation.__name__ = python.__name__
+    implementation.__doc__ = python.__doc__
+    implementation.__wrapped__ = native
+    return implementation
+
+
+def _candidates():
+    """Native implementations, each with a sample instance to probe."""
+    candidates = {
+        'ifilter': (six.moves.filter, lambda f: f(None, [0, 1, 2])),
+        'ifilterfalse': (six.moves.filterfalse,
+                         lambda f: f(None, [1, 0, 0])),
+        'takewhile': (itertools.takewhile, lambda f: f(bool, [1, 2, 0])),
+        'dropwhile': (itertools.dropwhile, lambda f: f(bool, [1, 0, 2])),
+        'groupby': (itertools.groupby, lambda f: f([1, 1, 2])),
+        'imap': (_native_imap, lambda f: f(abs, [-1, -2, -3])),
+        'starmap': (itertools.starmap, lambda f: f(max, [(1, 2), (3, 4)])),
+        'izip': (six.moves.zip, lambda f: f([1, 2, 3], [4, 5, 6])),
+        'izip_longest': (six.moves.zip_longest, lambda f: f([1, 2], [3])),
+        'permutations': (itertools.permutations, lambda f: f([1, 2, 3])),
+        'combinations': (itertools.combinations, lambda f: f([1, 2, 3], 2)),
+        'combinations_with_replacement': (
+            itertools.combinations_with_replacement,
+            lambda f: f([1, 2], 2)),
+        'product': (itertools.product, lambda f: f([1, 2], [3, 4])),
+        'chain': (itertools.chain, lambda f: f([1], [2, 3])),
+        'compress': (itertools.compress, lambda f: f([1, 2, 3], [1, 0, 1])),
+        'count': (itertools.count, lambda f: f(3, 2)),
+        'cycle': (itertools.cycle, lambda f: f([1, 2])),
+        'repeat': (itertools.repeat, lambda f: f(1, 3)),
+        'islice': (itertools.islice, lambda f: f([1, 2, 3, 4], 1, None, 2)),
+        'tee': (itertools.tee, lambda f: f([1, 2, 3])[0]),
+    }
+    if hasattr(itertools, 'accumulate'):
+        candidates['accumulate'] = (itertools.accumulate,
+                                    lambda f: f([1, 2, 3]))
+    return candidates
+
+
+def _pickles_correctly(make_sample):
+    with warnings.catch_warnings():
+        # Pickling itertools objects is deprecated as of Python 3.12.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        try:
+            sample = make_sample()
+            next(sample)
+            restored = cPickle.loads(cPickle.dumps(sample))
+            return (repr(list(itertools.islice(restored, 10))) ==
+                    repr(list(itertools.islice(sample, 10))))
+        except Exception:
+            return False
+
+
+def native_implementations():
+    """Return a dict of the native iterators that pickle correctly here.
+
+    Keys are the names of the corresponding pure-Python implementations.
+    The check is performed once and cached.
+    """
+    global _native
+    if _native is None:
+        _native = dict((name, native)
+                       for name, (native, make_sample)
+                       in _candidates().items()
+                       if _pickles_correctly(lambda: make_sample(native)))
+    return dict(_native)
+
+
+def use_backend(name):
+    """Choose the implementations exported by `picklable_itertools`.
+
+    With the default 'python' backend, every iterator is implemented in
+    this package. With 'native', names for which the standard library's
+    implementation pickles correctly on this interpreter are rebound to
+    it; the rest keep their pure-Python implementation. Iterators with a
+    vectorized variant are still constructed by this package when given
+    `vectorized` or `batch_size`.
+
+    Only the package namespace is affected: names imported from it before
+    the call keep their old binding, and the pure-Python classes in the
+    submodules (and therefore existing pickles) are untouched.
+    """
+    global _current
+    if name not in BACKENDS:
+        raise ValueError("unknown backend {!r}; expected one of {}".format(
+            name, ", ".join(BACKENDS)))
+    import picklable_itertools as package
+    implementations = dict(_PYTHON)
+    if name == 'native':
+        for attr, native in native_implementations().items():
+            python = implementations[attr]
+            if '_vectorized' in python.__dict__:
+                native = _with_vectorized(native, python)
+            implementations[attr] = native
+    for attr, implementation in implementations.items():
+        setattr(package, attr, implementation)
+    for alias, attr in _ALIASES.items():
+        setattr(package, alias, implementations[attr])
+    _current = name
+
+
+def get_backend():
+    """Return the name of the backend currently in use."""
+    return _current
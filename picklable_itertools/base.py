@@ -1,12 +1,101 @@
 from abc import ABCMeta, abstractmethod
+
 import six
 
+# A default for `next_or` that no iterator can return as an element, for use
+# within this package only.
+EXHAUSTED = object()
+
+
+def _default_next_or(self, default):
+    """Return the next element, or `default` if there are no more."""
+    try:
+        return self.__next__()
+    except StopIteration:
+        return default
+
+
+def _next_from(next_or_method):
+    """Build the `__next__` method of a class implementing `_next_or`."""
+    def __next__(self):
+        value = next_or_method(self, EXHAUSTED)
+        if value is EXHAUSTED:
+            raise StopIteration
+        return value
+    __next__.__doc__ = next_or_method.__doc__
+    return __next__
+
+
+class _ItertoolMeta(ABCMeta):
+    """Keep `__next__` and `_next_or` consistent with each other.
+
+    A class defining `_next_or` but not `__next__` gets a `__next__` calling
+    it. A class defining (or getting from a mixin) a `__next__` more
+    specific than the `_next_or` it would inherit gets the default
+    `_next_or`, which calls `__next__`, so that overriding `__next__` alone
+    keeps working. `_native_next_or` tells whether `_next_or` is anything
+    but the default.
+    """
+    def __new__(mcs, name, bases, namespace):
+        if '_next_or' in namespace and '__next__' not in namespace:
+            namespace = dict(namespace)
+            namespace['__next__'] = _next_from(namespace['_next_or'])
+        return super(_ItertoolMeta, mcs).__new__(mcs, name, bases, namespace)
 
-@six.add_metaclass(ABCMeta)
+    def __init__(cls, name, bases, namespace):
+        super(_ItertoolMeta, cls).__init__(name, bases, namespace)
+        mro = cls.__mro__
+        next_owner = next(klass for klass in mro
+                          if '__next__' in klass.__dict__)
+        next_or_owner = next((klass for klass in mro
+                              if '_next_or' in klass.__dict__), None)
+        if (next_or_owner is None or
+                mro.index(next_owner) < mro.index(next_or_owner)):
+            cls._next_or = _default_next_or
+            cls._native_next_or = False
+        else:
+            cls._native_next_or = (next_or_owner.__dict__['_next_or'] is not
+                                   _default_next_or)
+
+
+@six.add_metaclass(_ItertoolMeta)
 class BaseItertool(six.Iterator):
+    """The base class of the iterators in this package.
+
+    Subclasses implement either `__next__` or ``_next_or(default)``, which
+    returns `default` instead of raising StopIteration once the iterator is
+    exhausted; the other is derived from it. Iterators advance each other
+    through :func:`next_or`, so that exhaustion need not be signalled by
+    raising StopIteration through every layer of a tree of iterators.
+    Iterators on hot paths define both, as a derived `__next__` costs an
+    extra call per element.
+    """
     def __iter__(self):
         return self
 
     @abstractmethod
     def __next__(self):
         pass
+
+
+def has_next_or(iterator):
+    """Whether `iterator` implements `_next_or` without raising
+    StopIteration.
+
+    Iterators advancing another one on a hot path store this, and then call
+    ``iterator._next_or(default)`` if it is true, and ``next(iterator,
+    default)`` otherwise.
+    """
+    return getattr(iterator, '_native_next_or', False)
+
+
+def next_or(iterator, default):
+    """Return the next element of `iterator`, or `default` if exhausted.
+
+    Equivalent to ``next(iterator, default)``, but iterators implementing
+    `_next_or` directly are advanced through it, so that they need not
+    raise StopIteration when they run out.
+    """
+    if getattr(iterator, '_native_next_or', False):
+        return iterator._next_or(default)
+    return next(iterator, default)
@@ -0,0 +1,225 @@
+"""Picklable iterators grouping the elements of a stream into batches."""
+import bisect
+
+import six
+
+from .base import BaseItertool
+from .iter_dispatch import iter_, numpy, NUMPY_AVAILABLE
+
+
+class collate(BaseItertool):
+    """collate(iterable, batch_size, dtype=None, shape=None, ragged=False,
+               pad_value=0, num_buffers=None) --> collate object
+
+    Return NumPy arrays stacking up to `batch_size` consecutive examples
+    from iterable along a new first axis; the final batch may be shorter.
+    Examples are written directly into a preallocated array of shape
+    ``(batch_size,) + shape`` and type `dtype`, which default to those of
+    the first example.
+
+    With `ragged`, examples may be smaller than `shape` (which must then be
+    given) along any axis. They are padded with `pad_value`, and each batch
+    is returned as a ``(batch, mask)`` pair, `mask` being a boolean array
+    of the same shape that is true where the batch holds example data.
+
+    By default, a new array is allocated for every batch. Passing
+    `num_buffers` instead rotates between that many arrays, so that a batch
+    is overwritten `num_buffers` batches later: only keep references to
+    fewer than `num_buffers` batches at a time.
+
+    Only the examples of the batch in progress are pickled, not the
+    buffers.
+    """
+    def __init__(self, iterable, batch_size, dtype=None, shape=None,
+                 ragged=False, pad_value=0, num_buffers=None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("collate requires NumPy")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if num_buffers is not None and num_buffers < 1:
+            raise ValueError("num_buffers must be a positive integer")
+        if ragged and shape is None:
+            raise ValueError("ragged collation requires a shape")
+        self._iterable = iter_(iterable)
+        self._batch_size = batch_size
+        self._dtype = None if dtype is None else numpy.dtype(dtype)
+        self._shape = None if shape is None else tuple(shape)
+        self._ragged = ragged
+        self._pad_value = pad_value
+        self._num_buffers = num_buffers
+        self._pool = []
+        self._next_buffer = 0
+        self._current = None
+        self._count = 0
+
+    def _acquire(self):
+        """Return the (batch, mask) buffers to fill next."""
+        if (self._num_buffers is not None and
+                len(self._pool) == self._num_buffers):
+            buffers = self._pool[self._next_buffer]
+            self._next_buffer = (self._next_buffer + 1) % self._num_buffers
+            return buffers
+        shape = (self._batch_size,) + self._shape
+        buffers = (numpy.empty(shape, dtype=self._dtype),
+                   numpy.empty(shape, dtype=bool) if self._ragged else None)
+        if self._num_buffers is not None:
+            self._pool.append(buffers)
+        return buffers
+
+    def _write(self, example):
+        if self._shape is None or self._dtype is None:
+            example = numpy.asarray(example, dtype=self._dtype)
+            if self._shape is None:
+                self._shape = example.shape
+            if self._dtype is None:
+                self._dtype = example.dtype
+        if self._current is None:
+            self._current = self._acquire()
+        batch, mask = self._current
+        shape = numpy.shape(example)
+        if not self._ragged:
+            if shape != self._shape:
+                raise ValueError("expected an example of shape {}, got "
+                                 "{}".format(self._shape, shape))
+            batch[self._count] = example
+        else:
+            if (len(shape) != len(self._shape) or
+                    any(n > m for n, m in zip(shape, self._shape))):
+                raise ValueError("expected an example of shape at most {}, "
+                                 "got {}".format(self._shape, shape))
+            region = (self._count,) + tuple(slice(0, n) for n in shape)
+            batch[self._count] = self._pad_value
+            batch[region] = example
+            mask[self._count] = False
+            mask[region] = True
+        self._count += 1
+
+    def __next__(self):
+        while self._count < self._batch_size:
+            try:
+                example = next(self._iterable)
+            except StopIteration:
+                if self._count == 0:
+                    raise
+                break
+            self._write(example)
+        batch, mask = self._current
+        if self._count < self._batch_size:
+            batch = batch[:self._count]
+            if mask is not None:
+                mask = mask[:self._count]
+        self._current = None
+        self._count = 0
+        return (batch, mask) if self._ragged else batch
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = []
+        state['_next_buffer'] = 0
+        if self._current is not None:
+            state['_current'] = tuple(
+                None if buffer is None else buffer[:self._count].copy()
+                for buffer in self._current)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._current is not None:
+            partial = self._current
+            self._current = self._acquire()
+            for buffer, values in zip(self._current, partial):
+                if buffer is not None:
+                    buffer[:self._count] = values
+
+
+class bucket_by(BaseItertool):
+    """bucket_by(iterable, key, boundaries, batch_size, max_buffered=None,
+                 flush='largest') --> bucket_by object
+
+    Return tuples of elements of iterable whose `key` (typically their
+    length) fall in the same bucket. With sorted `boundaries` ``b0, b1,
+    ...``, bucket 0 holds keys below `b0`, bucket 1 keys from `b0` up to
+    `b1`, and so on, the last bucket holding keys from the last boundary
+    up. A bucket is returned as soon as it holds `batch_size` elements,
+    which may also be a list giving one size per bucket.
+
+    If `max_buffered` is given, no more than that many elements are held
+    over all buckets: when one more arrives, a bucket is returned early,
+    the fullest one with `flush='largest'`, or the one holding the element
+    that arrived first with `flush='oldest'`. Once iterable is exhausted,
+    the remaining buckets are returned in order.
+
+    Only the partially filled buckets are pickled along with iterable.
+    """
+    _FLUSH_POLICIES = ('largest', 'oldest')
+
+    def __init__(self, iterable, key, boundaries, batch_size,
+                 max_buffered=None, flush='largest'):
+        boundaries = list(boundaries)
+        if any(a >= b for a, b in zip(boundaries, boundaries[1:])):
+            raise ValueError("boundaries must be strictly increasing")
+        num_buckets = len(boundaries) + 1
+        if isinstance(batch_size, (list, tuple)):
+            batch_sizes = list(batch_size)
+            if len(batch_sizes) != num_buckets:
+                raise ValueError("expected {} batch sizes, got {}".format(
+                    num_buckets, len(batch_sizes)))
+        else:
+            batch_sizes = [batch_size] * num_buckets
+        if any(size < 1 for size in batch_sizes):
+            raise ValueError("batch_size must be a positive integer")
+        if max_buffered is not None and max_buffered < 1:
+            raise ValueError("max_buffered must be a positive integer")
+        if flush not in self._FLUSH_POLICIES:
+            raise ValueError("flush must be one of {}".format(
+                ", ".join(self._FLUSH_POLICIES)))
+        self._iterable = iter_(iterable)
+        self._key = key
+        self._boundaries = boundaries
+        self._batch_sizes = batch_sizes
+        self._max_buffered = max_buffered
+        self._flush = flush
+        self._buckets = [[] for _ in six.moves.xrange(num_buckets)]
+        # The arrival number of the first element in each bucket.
+        self._first_arrivals = [None] * num_buckets
+        self._arrivals = 0
+        self._buffered = 0
+        self._exhausted = False
+
+    def _pop(self, index):
+        batch = tuple(self._buckets[index])
+        self._buckets[index] = []
+        self._first_arrivals[index] = None
+        self._buffered -= len(batch)
+        return batch
+
+    def _victim(self):
+        """The index of the bucket to flush to make room."""
+        indices = [i for i, bucket in enumerate(self._buckets) if bucket]
+        if self._flush == 'largest':
+            return max(indices, key=lambda i: len(self._buckets[i]))
+        return min(indices, key=lambda i: self._first_arrivals[i])
+
+    def __next__(self):
+        while not self._exhausted:
+            try:
+                value = next(self._iterable)
+            except StopIteration:
+                self._exhausted = True
+                break
+            index = bisect.bisect_right(self._boundaries, self._key(value))
+            bucket = self._buckets[index]
+            if not bucket:
+                self._first_arrivals[index] = self._arrivals
+            self._arrivals += 1
+            bucket.append(value)
+            self._buffered += 1
+            if len(bucket) >= self._batch_sizes[index]:
+                return self._pop(index)
+            if (self._max_buffered is not None and
+                    self._buffered > self._max_buffered):
+                return self._pop(self._victim())
+        for index, bucket in enumerate(self._buckets):
+            if bucket:
+                return self._pop(index)
+        raise StopIteration
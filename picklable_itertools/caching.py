@@ -0,0 +1,215 @@
+"""A picklable iterator caching a stream in a file to replay it cheaply."""
+import mmap
+import os
+import struct
+
+import six
+from six.moves import cPickle
+
+from .base import BaseItertool
+from .iter_dispatch import iter_, advance, numpy, NUMPY_AVAILABLE
+
+# The index file holds a header, the number of records once the cache is
+# complete (or _INCOMPLETE until then), followed by the offset at which
+# each record ends in the data file. Records start at multiples of
+# _ALIGNMENT, so that arrays read in place are aligned.
+_OFFSET = struct.Struct('<Q')
+_INCOMPLETE = 2 ** 64 - 1
+_ALIGNMENT = 16
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class _pickle_serializer(object):
+    """Records are pickles."""
+    def dumps(self, obj):
+        return cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL)
+
+    def loads(self, buffer):
+        return cPickle.loads(buffer)
+
+
+class _numpy_serializer(object):
+    """Records are NumPy arrays, read back as read-only views of the file.
+
+    A record is the length of a pickled ``(dtype, shape)`` header, the
+    header, and the array's data, aligned.
+    """
+    _LENGTH = struct.Struct('<I')
+
+    def dumps(self, obj):
+        array = numpy.ascontiguousarray(obj)
+        if array.dtype.hasobject:
+            raise ValueError("the numpy serializer does not support arrays "
+                             "of objects")
+        header = cPickle.dumps((array.dtype.str, array.shape), 2)
+        start = _aligned(self._LENGTH.size + len(header))
+        padding = b'\0' * (start - self._LENGTH.size - len(header))
+        return (self._LENGTH.pack(len(header)) + header + padding +
+                array.tobytes())
+
+    def loads(self, buffer):
+        length, = self._LENGTH.unpack_from(buffer)
+        header = bytes(buffer[self._LENGTH.size:self._LENGTH.size + length])
+        dtype, shape = cPickle.loads(header)
+        dtype = numpy.dtype(dtype)
+        count = 1
+        for size in shape:
+            count *= size
+        array = numpy.frombuffer(
+            buffer, dtype, count, _aligned(self._LENGTH.size + length))
+        return array.reshape(shape)
+
+
+_SERIALIZERS = {'pickle': _pickle_serializer, 'numpy': _numpy_serializer}
+
+
+class cache(BaseItertool):
+    """cache(iterable, path, serializer='pickle') --> cache object
+
+    Return the elements of iterable, storing them in the file at `path`
+    (and an index of their offsets at ``path + '.index'``) so that later
+    passes replay them from disk instead of recomputing them. Once a pass
+    has exhausted iterable, a new ``cache(iterable, path)`` reads every
+    element from the file, through a memory map, and iterable is not used.
+
+    `serializer` is 'pickle', 'numpy' (for NumPy array elements, which are
+    then returned as read-only views of the memory map, without copying) or
+    an object with ``dumps(obj)`` and ``loads(buffer)`` methods.
+
+    A pass interrupted before iterable is exhausted leaves a partial cache:
+    a new `cache` on the same path replays the elements written so far,
+    then advances iterable past them (repositioning it directly if it is
+    backed by a sequence, and stepping through it otherwise) and carries
+    on writing. iterable may be None to replay a complete cache only.
+
+    Only the path, the serializer and the position are pickled,
+    along with iterable while the cache is incomplete.
+    """
+    def __init__(self, iterable, path, serializer='pickle'):
+        if isinstance(serializer, six.string_types):
+            if serializer not in _SERIALIZERS:
+                raise ValueError("serializer must be one of {}".format(
+                    ", ".join(sorted(_SERIALIZERS))))
+            if serializer == 'numpy' and not NUMPY_AVAILABLE:
+                raise ImportError("the numpy serializer requires NumPy")
+            serializer = _SERIALIZERS[serializer]()
+        self._iterable = None if iterable is None else iter_(iterable)
+        self._path = path
+        self._serializer = serializer
+        self._position = 0
+        # The number of elements taken from iterable.
+        self._consumed = 0
+        # Derived from the files on the first call, so not pickled: the
+        # number of records, whether the cache is complete, memory maps of
+        # the records there were when the files were opened, and the files
+        # to append records to.
+        self._count = None
+        self._complete = False
+        self._data = self._index = None
+        self._files = None
+
+    def _open(self):
+        index_path = self._path + '.index'
+        if not os.path.exists(index_path):
+            open(self._path, 'wb').close()
+            with open(index_path, 'wb') as index_file:
+                index_file.write(_OFFSET.pack(_INCOMPLETE))
+        with open(index_path, 'rb') as index_file:
+            count, = _OFFSET.unpack(index_file.read(_OFFSET.size))
+        if count != _INCOMPLETE:
+            self._complete = True
+            self._iterable = None
+        else:
+            count = self._repair(index_path)
+        self._count = count
+        if count > 0:
+            self._index = self._map(index_path)
+            self._data = self._map(self._path)
+
+    def _repair(self, index_path):
+        """Drop whatever an interrupted write left past the last indexed
+        record; return the number of records."""
+        count = (os.path.getsize(index_path) - _OFFSET.size) // _OFFSET.size
+        with open(index_path, 'r+b') as index_file:
+            index_file.truncate(_OFFSET.size * (count + 1))
+        with open(self._path, 'r+b') as data_file:
+            data_file.truncate(self._end(count - 1, index_path)
+                               if count > 0 else 0)
+        return count
+
+    def _end(self, index, index_path=None):
+        """The offset at which record `index` ends in the data file."""
+        offset = _OFFSET.size * (index + 1)
+        if index_path is None:
+            return _OFFSET.unpack_from(self._index, offset)[0]
+        with open(index_path, 'rb') as index_file:
+            index_file.seek(offset)
+            return _OFFSET.unpack(index_file.read(_OFFSET.size))[0]
+
+    @staticmethod
+    def _map(path):
+        with open(path, 'rb') as mapped_file:
+            return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, index):
+        start = _aligned(self._end(index - 1)) if index > 0 else 0
+        return self._serializer.loads(
+            memoryview(self._data)[start:self._end(index)])
+
+    def _append(self, value):
+        if self._files is None:
+            self._files = (open(self._path, 'ab'),
+                           open(self._path + '.index', 'ab'))
+        data_file, index_file = self._files
+        record = self._serializer.dumps(value)
+        start = _aligned(data_file.tell())
+        data_file.write(b'\0' * (start - data_file.tell()))
+        data_file.write(record)
+        # The data is written out before the index refers to it.
+        data_file.flush()
+        index_file.write(_OFFSET.pack(start + len(record)))
+        index_file.flush()
+        self._count += 1
+
+    def _finish(self):
+        if self._files is not None:
+            for open_file in self._files:
+                open_file.close()
+            self._files = None
+        with open(self._path + '.index', 'r+b') as index_file:
+            index_file.write(_OFFSET.pack(self._count))
+        self._complete = True
+        self._iterable = None
+
+    def __next__(self):
+        if self._count is None:
+            self._open()
+        if self._position < self._count:
+            self._position += 1
+            return self._read(self._position - 1)
+        if self._complete:
+            raise StopIteration
+        if self._iterable is None:
+            raise ValueError("the cache at {} is incomplete and no iterable "
+                             "was given".format(self._path))
+        self._consumed += advance(self._iterable,
+                                  self._position - self._consumed)
+        try:
+            value = next(self._iterable)
+        except StopIteration:
+            self._finish()
+            raise
+        self._consumed += 1
+        self._append(value)
+        self._position += 1
+        return value
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_count', '_data', '_index', '_files'):
+            state[name] = None
+        state['_complete'] = False
+        return state
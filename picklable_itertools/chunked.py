@@ -0,0 +1,134 @@
+"""Support code for the vectorized variants of iterators.
+
+Iterators supporting it accept ``vectorized=True`` (and optionally a
+``batch_size``), in which case they are constructed as an instance of a
+variant class working on sequences, typically NumPy arrays, a chunk of
+`batch_size` elements at a time. Whatever a variant computes for its
+current chunk is only a cache: it is left out of pickles and recomputed
+from the position when needed, so that the pickled state stays small.
+"""
+from abc import ABCMeta, abstractmethod
+
+import six
+
+from .iter_dispatch import as_sequence, numpy
+
+DEFAULT_BATCH_SIZE = 1024
+
+
+def vectorized_new(base, cls, kwargs):
+    """Implement `__new__` for `base`, a class with a vectorized variant.
+
+    The variant is found in the `_vectorized` attribute defined by `cls`
+    itself, so that subclasses do not silently inherit their parent's.
+    """
+    if kwargs.get('vectorized', False) and not issubclass(cls,
+                                                          VectorizedMixin):
+        variant = cls.__dict__.get('_vectorized')
+        if variant is None:
+            raise ValueError("{} does not support vectorized=True".format(
+                cls.__name__))
+        cls = variant
+    return super(base, cls).__new__(cls)
+
+
+def check_scalar_kwargs(kwargs):
+    """Validate the keyword arguments given to a non-vectorized iterator."""
+    kwargs.pop('vectorized', None)
+    if len(kwargs) > 0:
+        raise ValueError("Unrecognized keyword arguments: {}".format(
+            ", ".join(kwargs)))
+
+
+def pop_batch_size(kwargs):
+    """Remove `vectorized` and `batch_size` from `kwargs`.
+
+    Returns the batch size. Raises ValueError if any other keyword
+    arguments remain.
+    """
+    kwargs.pop('vectorized', None)
+    batch_size = kwargs.pop('batch_size', DEFAULT_BATCH_SIZE)
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    return batch_size
+
+
+def as_chunkable(obj):
+    """Return the sequence backing `obj`, from its current position.
+
+    Raises TypeError if `obj` is not backed by a sequence.
+    """
+    sequence, start = as_sequence(obj)
+    if sequence is None:
+        raise TypeError("vectorized iterators require sequences such as "
+                        "NumPy arrays, not {}".format(type(obj).__name__))
+    return sequence[start:] if start else sequence
+
+
+def require_numpy(name):
+    """Raise ImportError if NumPy, needed by vectorized `name`, is missing."""
+    if numpy is None:
+        raise ImportError("vectorized {} requires NumPy".format(name))
+
+
+def check_length(results, expected):
+    """Check that a vectorized function returned `expected` results."""
+    try:
+        count = len(results)
+    except TypeError:
+        raise ValueError("vectorized function returned no sequence of "
+                         "results for {} elements".format(expected))
+    if count != expected:
+        raise ValueError("vectorized function returned {} results for "
+                         "{} elements".format(count, expected))
+
+
+class VectorizedMixin(object):
+    """Mixin for vectorized variants, keeping their caches out of pickles.
+
+    Attributes named in `_cached` are pickled as None.
+    """
+    _cached = ('_chunk',)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in self._cached:
+            state[attribute] = None
+        return state
+
+
+@six.add_metaclass(ABCMeta)
+class MaskSelectionMixin(VectorizedMixin):
+    """Mixin for variants returning the elements of a sequence for which
+    a boolean mask, computed a chunk at a time, is true.
+
+    Subclasses set `_sequence`, `_length`, `_batch_size` and `_position`
+    (the index of the next element to consider) and implement
+    ``_mask(start, stop)``. Only the indices of the elements of the
+    current chunk that survive are cached.
+    """
+    _cached = ('_survivors', '_offset', '_chunk_stop')
+
+    @abstractmethod
+    def _mask(self, start, stop):
+        pass
+
+    def __next__(self):
+        while True:
+            survivors = self._survivors
+            if survivors is not None:
+                if self._offset < len(survivors):
+                    index = survivors[self._offset]
+                    self._offset += 1
+                    self._position = index + 1
+                    return self._sequence[index]
+                self._position = self._chunk_stop
+            start = self._position
+            if start >= self._length:
+                raise StopIteration
+            stop = min(start + self._batch_size, self._length)
+            mask = self._mask(start, stop)
+            check_length(mask, stop - start)
+            self._survivors = numpy.flatnonzero(mask) + start
+            self._offset = 0
+            self._chunk_stop = stop
@@ -1,16 +1,54 @@
 """Related things that aren't part of the standard library's `itertools`.
 
 Currently home to picklable reimplementations of a few of the generators
-from Matthew Rocklin's Toolz package.
+from Matthew Rocklin's Toolz package, as well as utilities for building
+resumable data pipelines (such as `shuffle`) that live in their own modules.
 
-Docstrings for `partition`, `partition_all`, and 'interleave' are lifted
-wholesale from the Toolz documentation
+Docstrings for `partition`, `partition_all`, `sliding_window` and
+'interleave' are lifted wholesale from the Toolz documentation
 <http://toolz.readthedocs.org/en/latest/>.
 """
+import collections
+import heapq
+
 import six
-from .base import BaseItertool
-from .map_zip import imap, izip_longest
-from .iter_dispatch import iter_
+from .base import BaseItertool, EXHAUSTED, has_next_or, next_or
+from .map_zip import izip_longest
+from .chunked import (
+    VectorizedMixin, vectorized_new, check_scalar_kwargs, pop_batch_size,
+    as_chunkable, require_numpy
+)
+from .iter_dispatch import (
+    iter_, advance, numpy, NUMPY_AVAILABLE
+)
+from .range import xrange
+from .batching import collate, bucket_by  # noqa
+from .caching import cache  # noqa
+from .fusion import fuse  # noqa
+from .merging import merge, external_sorted, merge_join  # noqa
+from .sampling import shuffle, mix, reservoir_sample  # noqa
+from .slicing import shard, reshard  # noqa
+from .unique import unique  # noqa
+
+if NUMPY_AVAILABLE:
+    from numpy.lib.stride_tricks import as_strided
+
+# Sequences known to support slicing; others, such as deques, are iterated
+# over. Python 2's built-in xrange cannot be sliced.
+_SLICEABLE = ((list, tuple, six.text_type, six.binary_type, xrange) +
+              ((range,) if six.PY3 else ()))
+
+
+def _sliceable(seq):
+    """Return `seq` if it is a sequence known to support slicing (our
+    `xrange` as the built-in range, which slices much faster), or None.
+    """
+    if isinstance(seq, xrange) and six.PY3:
+        return range(seq.start, seq.stop, seq.step)
+    if isinstance(seq, _SLICEABLE) or (NUMPY_AVAILABLE and
+                                       isinstance(seq, numpy.ndarray)):
+        return seq
+    return None
 
 
 class partition(BaseItertool):
@@ -29,6 +67,9 @@ class partition(BaseItertool):
     >>> list(partition(2, [1, 2, 3, 4, 5], pad=None))
     [(1, 2), (3, 4), (5, None)]
 
+    NumPy arrays are partitioned into views, except for a padded final
+    partition, which is a tuple.
+
     See Also:
         partition_all
     """
@@ -43,7 +84,7 @@ class partition(BaseItertool):
         items = next(self._partition_all)
         if len(items) < self._n:
             if self._pad != self._NO_PAD:
-                items += (self._pad,) * (self._n - len(items))
+                items = tuple(items) + (self._pad,) * (self._n - len(items))
             else:
                 raise StopIteration
         return items
@@ -53,6 +94,8 @@ class partition_all(BaseItertool):
     """Partition all elements of sequence into tuples of length at most n
 
     The final tuple may be shorter to accommodate extra elements.
+    Sequences such as lists, tuples and ranges are sliced rather than
+    iterated over, and NumPy arrays yield views rather than tuples.
 
     >>> list(partition_all(2, [1, 2, 3, 4]))
     [(1, 2), (3, 4)]
@@ -64,9 +107,24 @@ class partition_all(BaseItertool):
     """
     def __init__(self, n, seq):
         self._n = n
-        self._seq = iter_(seq)
+        # Sequences are sliced, and only the offset needs pickling.
+        # Iterators, even over sequences, may be shared, so they are
+        # advanced as usual.
+        sequence = _sliceable(seq)
+        self._position = 0
+        self._sequence = sequence
+        self._views = NUMPY_AVAILABLE and isinstance(sequence, numpy.ndarray)
+        self._seq = iter_(seq) if sequence is None else None
 
     def __next__(self):
+        if self._sequence is not None:
+            start = self._position
+            length = len(self._sequence)
+            if start >= length:
+                raise StopIteration
+            self._position = min(start + self._n, length)
+            items = self._sequence[start:self._position]
+            return items if self._views else tuple(items)
         items = []
         try:
             for _ in six.moves.xrange(self._n):
@@ -78,6 +136,126 @@ class partition_all(BaseItertool):
         return tuple(items)
 
 
+class sliding_window(BaseItertool):
+    """A sequence of overlapping subsequences
+
+    >>> list(sliding_window(2, [1, 2, 3, 4]))
+    [(1, 2), (2, 3), (3, 4)]
+
+    This function creates a sliding window suitable for transformations like
+    sliding means / smoothing
+
+    >>> mean = lambda seq: float(sum(seq)) / len(seq)
+    >>> list(map(mean, sliding_window(2, [1, 2, 3, 4])))
+    [1.5, 2.5, 3.5]
+
+    With `step`, consecutive windows start `step` elements apart, and a
+    final window that would run past the end is dropped. Sequences are
+    sliced, NumPy arrays yielding views. Other iterables are read into a
+    ring buffer stored twice over, so that every window is a contiguous
+    slice of it; only the current window is pickled.
+
+    With ``vectorized=True``, the input must be a sequence (typically a
+    NumPy array) and each element returned is an array holding up to
+    `batch_size` (default 1024) consecutive windows. It is a read-only
+    view of the input, built with `as_strided`, as windows overlap.
+    """
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(sliding_window, cls, kwargs)
+
+    def __init__(self, n, seq, step=1, **kwargs):
+        check_scalar_kwargs(kwargs)
+        _check_window(n, step)
+        self._n = n
+        self._step = step
+        # As in partition_all, only sequences themselves are sliced.
+        sequence = _sliceable(seq)
+        self._position = 0
+        self._sequence = sequence
+        self._views = NUMPY_AVAILABLE and isinstance(sequence, numpy.ndarray)
+        if sequence is None:
+            self._seq = iter_(seq)
+            self._buffer = [None] * (2 * n)
+            # Where the next element goes in the buffer; the current window
+            # is the n elements from there on.
+            self._index = 0
+            self._started = False
+        else:
+            self._seq = None
+
+    def _read(self, count):
+        buffer, n = self._buffer, self._n
+        if count > n:
+            if advance(self._seq, count - n) < count - n:
+                raise StopIteration
+            count = n
+        for _ in six.moves.xrange(count):
+            value = next(self._seq)
+            buffer[self._index] = buffer[self._index + n] = value
+            self._index = (self._index + 1) % n
+
+    def __next__(self):
+        if self._sequence is not None:
+            start, stop = self._position, self._position + self._n
+            if stop > len(self._sequence):
+                raise StopIteration
+            self._position += self._step
+            items = self._sequence[start:stop]
+            return items if self._views else tuple(items)
+        self._read(self._step if self._started else self._n)
+        self._started = True
+        return tuple(self._buffer[self._index:self._index + self._n])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._sequence is None:
+            state['_buffer'] = self._buffer[self._index:self._index + self._n]
+            state['_index'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._sequence is None:
+            self._buffer = self._buffer * 2
+
+
+class _vectorized_sliding_window(VectorizedMixin, sliding_window):
+    """The ``vectorized=True`` variant of `sliding_window`."""
+    _cached = ()
+
+    def __init__(self, n, seq, step=1, **kwargs):
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy('sliding_window')
+        _check_window(n, step)
+        self._n = n
+        self._step = step
+        self._sequence = numpy.asarray(as_chunkable(seq))
+        self._num_windows = max(0, (len(self._sequence) - n) // step + 1)
+        self._window = 0
+
+    def __next__(self):
+        if self._window >= self._num_windows:
+            raise StopIteration
+        count = min(self._batch_size, self._num_windows - self._window)
+        sequence = self._sequence[self._window * self._step:]
+        self._window += count
+        return as_strided(
+            sequence, shape=(count, self._n) + sequence.shape[1:],
+            strides=(self._step * sequence.strides[0],) + sequence.strides,
+            writeable=False)
+
+
+sliding_window._vectorized = _vectorized_sliding_window
+
+
+def _check_window(n, step):
+    if n < 1:
+        raise ValueError("window size must be a positive integer")
+    if step < 1:
+        raise ValueError("step must be a positive integer")
+
+
 class NoMoreItems(object):
     """Sentinel value for `equizip`. Do not use for any other purpose."""
     pass
@@ -116,28 +294,102 @@ class interleave(BaseItertool):
     Both the individual sequences and the sequence of sequences may be infinite
 
     Returns a lazy iterator
+
+    Exhausted sequences are dropped, as are sequences raising one of the
+    `pass_exceptions`. If `weights` are given, one per sequence (which
+    must then be finitely many), the sequences are instead taken from in
+    proportion to their weights, spread out as evenly as possible;
+    sequences with equal weights are taken from in turn.
     """
-    def __init__(self, iterables, pass_exceptions=()):
-        self._iters = imap(iter, iterables)
-        self._more = []
-        self._pass_exceptions = pass_exceptions
+    def __init__(self, iterables, pass_exceptions=(), weights=None):
+        self._pass_exceptions = (StopIteration,) + tuple(pass_exceptions)
+        if weights is None:
+            self._pending = iter_(iterables)
+            self._active = collections.deque()
+            self._weighted = False
+        else:
+            self._iters = [iter_(iterable) for iterable in iterables]
+            self._natives = [has_next_or(it) for it in self._iters]
+            weights = list(weights)
+            if len(weights) != len(self._iters):
+                raise ValueError("expected {} weights, got {}".format(
+                    len(self._iters), len(weights)))
+            if any(weight <= 0 for weight in weights):
+                raise ValueError("weights must be positive")
+            # Stride scheduling: the input with the smallest pass goes
+            # next, then advances its pass by the inverse of its weight.
+            self._strides = [1. / weight for weight in weights]
+            self._heap = [(stride, index)
+                          for index, stride in enumerate(self._strides)]
+            heapq.heapify(self._heap)
+            self._weighted = True
+
+    def _next_uniform(self, default):
+        while True:
+            if self._pending is not None:
+                iterable = next_or(self._pending, EXHAUSTED)
+                if iterable is EXHAUSTED:
+                    self._pending = None
+                    continue
+                it = iter_(iterable)
+            elif self._active:
+                it = self._active.popleft()
+            else:
+                return default
+            try:
+                # next_or, inlined.
+                if getattr(it, '_native_next_or', False):
+                    value = it._next_or(EXHAUSTED)
+                else:
+                    value = next(it, EXHAUSTED)
+            except self._pass_exceptions:
+                continue
+            if value is not EXHAUSTED:
+                self._active.append(it)
+                return value
+
+    def _next_weighted(self, default):
+        while self._heap:
+            pass_, index = heapq.heappop(self._heap)
+            it = self._iters[index]
+            try:
+                value = (it._next_or(EXHAUSTED) if self._natives[index] else
+                         next(it, EXHAUSTED))
+            except self._pass_exceptions:
+                value = EXHAUSTED
+            if value is EXHAUSTED:
+                self._iters[index] = None
+                continue
+            heapq.heappush(self._heap,
+                           (pass_ + self._strides[index], index))
+            return value
+        return default
+
+    def _next_or(self, default):
+        if self._weighted:
+            return self._next_weighted(default)
+        return self._next_uniform(default)
 
     def __next__(self):
-        try:
-            it = next(self._iters)
-        except StopIteration:
-            if len(self._more) == 0:
-                raise
-            else:
-                self._iters = imap(iter, self._more)
-                self._more = []
-                return next(self)
-        try:
-            result = next(it)
-            self._more.append(it)
-            return result
-        except (StopIteration,) + tuple(self._pass_exceptions):
-            return next(self)
+        if self._weighted:
+            value = self._next_weighted(EXHAUSTED)
+        else:
+            value = self._next_uniform(EXHAUSTED)
+        if value is EXHAUSTED:
+            raise StopIteration
+        return value
+
+    def __setstate__(self, state):
+        if '_more' in state:
+            # Pickled before interleave was rebuilt, when it took from the
+            # iterators in `_iters` until the end of the round, and then
+            # from those put in `_more`.
+            state = {'_pending': state['_iters'],
+                     '_active': collections.deque(state['_more']),
+                     '_weighted': False,
+                     '_pass_exceptions': ((StopIteration,) +
+                                          tuple(state['_pass_exceptions']))}
+        self.__dict__.update(state)
 
 
 def roundrobin(*iterables):
@@ -1,12 +1,20 @@
 from abc import ABCMeta, abstractmethod
 import six
-from .iter_dispatch import iter_
+from .iter_dispatch import iter_, numpy
 from .base import BaseItertool
+from .chunked import (
+    VectorizedMixin, MaskSelectionMixin, vectorized_new, check_scalar_kwargs,
+    pop_batch_size, as_chunkable, check_length, require_numpy
+)
 
 
 @six.add_metaclass(ABCMeta)
 class BaseFilter(BaseItertool):
-    def __init__(self, pred, seq):
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(BaseFilter, cls, kwargs)
+
+    def __init__(self, pred, seq, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._predicate = pred
         self._iter = iter_(seq)
 
@@ -21,6 +29,13 @@ class ifilter(BaseFilter):
     Return an iterator yielding those items of iterable for which
     function(item) is true. If function is None, return the items that are
     true.
+
+    With ``vectorized=True``, the iterable must be a sequence such as a
+    NumPy array, and function is called on slices of up to `batch_size`
+    (default 1024) elements, returning a boolean mask. The iterator then
+    jumps directly to the surviving indices. This also applies to
+    `ifilterfalse`, `takewhile` and `dropwhile`, which search each mask for
+    the first false value.
     """
 
     def _keep(self, value):
@@ -69,3 +84,93 @@ class dropwhile(takewhile):
             value = next(self._iter)
         self._started = True
         return value
+
+
+class _vectorized_ifilter(MaskSelectionMixin, ifilter):
+    """The ``vectorized=True`` variant of `ifilter`."""
+    def __init__(self, pred, seq, **kwargs):
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy(type(self).__name__)
+        self._predicate = pred
+        self._sequence = as_chunkable(seq)
+        self._length = len(self._sequence)
+        self._position = 0
+        self._survivors = self._offset = self._chunk_stop = None
+
+    def _mask(self, start, stop):
+        chunk = self._sequence[start:stop]
+        return chunk if self._predicate is None else self._predicate(chunk)
+
+
+class _vectorized_ifilterfalse(_vectorized_ifilter, ifilterfalse):
+    """The ``vectorized=True`` variant of `ifilterfalse`."""
+    def _mask(self, start, stop):
+        mask = super(_vectorized_ifilterfalse, self)._mask(start, stop)
+        check_length(mask, stop - start)
+        return numpy.logical_not(mask)
+
+
+class _vectorized_takewhile(VectorizedMixin, takewhile):
+    """The ``vectorized=True`` variant of `takewhile`.
+
+    `_checked` elements are known to satisfy the predicate; once `_found`,
+    the element at `_checked` is known not to. Nothing needs caching.
+    """
+    _cached = ()
+
+    def __init__(self, pred, seq, **kwargs):
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy(type(self).__name__)
+        self._predicate = pred
+        self._sequence = as_chunkable(seq)
+        self._length = len(self._sequence)
+        self._position = 0
+        self._checked = 0
+        self._found = False
+
+    def _scan(self):
+        """Evaluate the predicate on the next chunk."""
+        start = self._checked
+        stop = min(start + self._batch_size, self._length)
+        mask = self._predicate(self._sequence[start:stop])
+        check_length(mask, stop - start)
+        mask = numpy.asarray(mask, dtype=bool)
+        first_false = numpy.argmin(mask) if len(mask) else 0
+        if len(mask) and not mask[first_false]:
+            self._checked = start + first_false
+            self._found = True
+        else:
+            self._checked = stop
+
+    def __next__(self):
+        position = self._position
+        while (position >= self._checked and not self._found and
+               self._checked < self._length):
+            self._scan()
+        if position >= self._checked:
+            raise StopIteration
+        self._position += 1
+        return self._sequence[position]
+
+
+class _vectorized_dropwhile(_vectorized_takewhile, dropwhile):
+    """The ``vectorized=True`` variant of `dropwhile`."""
+    def __next__(self):
+        if not self._found:
+            while not self._found and self._checked < self._length:
+                self._scan()
+            self._found = True
+            self._position = self._checked
+        position = self._position
+        if position >= self._length:
+            raise StopIteration
+        self._position += 1
+        return self._sequence[position]
+
+
+ifilter._vectorized = _vectorized_ifilter
+ifilterfalse._vectorized = _vectorized_ifilterfalse
+takewhile._vectorized = _vectorized_takewhile
+dropwhile._vectorized = _vectorized_dropwhile
@@ -0,0 +1,105 @@
+"""Fusion of chains of mapping and filtering iterators into a single one."""
+from .base import BaseItertool
+from .filter import ifilter, ifilterfalse
+from .iter_dispatch import iter_
+from .map_zip import imap, starmap
+
+# The kinds of stages, in the order the fused loop tests for them.
+_MAP, _STARMAP, _FILTER, _FILTERFALSE = range(4)
+_CLASSES = {_MAP: imap, _STARMAP: starmap, _FILTER: ifilter,
+            _FILTERFALSE: ifilterfalse}
+
+
+def _stage(node):
+    """Return the `(kind, function)` stage performed by `node` and the
+    iterator it reads from, or None if it cannot be fused."""
+    node_type = type(node)
+    if node_type is imap or node_type is starmap:
+        if len(node._iterables) != 1 or node._function is None:
+            return None
+        kind = _MAP if node_type is imap else _STARMAP
+        return (kind, node._function), node._iterables[0]
+    if node_type is ifilter or node_type is ifilterfalse:
+        kind = _FILTER if node_type is ifilter else _FILTERFALSE
+        return (kind, node._predicate or bool), node._iter
+    return None
+
+
+def fuse(iterator):
+    """Fuse the chain of mapping and filtering iterators at the top of a
+    tree of iterators into a single one.
+
+    Consecutive single-iterable `imap`, `starmap`, `ifilter` and
+    `ifilterfalse` objects, starting from `iterator` itself, are replaced by
+    a :class:`fused` iterator that passes each element of the first other
+    iterator found through all their functions in one loop. It returns the
+    same elements, and pickles the same functions and the same source
+    iterator, without the intermediate iterators' overhead. A chain ending
+    in a `fused` iterator is merged into it.
+
+    The intermediate iterators must not be used elsewhere, as they are no
+    longer advanced. `iterator` is returned unchanged if it does not start
+    a chain of at least two such iterators.
+    """
+    stages = []
+    node = iterator
+    while True:
+        found = _stage(node)
+        if found is None:
+            break
+        stage, node = found
+        stages.append(stage)
+    stages.reverse()
+    if type(node) is fused and stages:
+        return fused(node._source, node._stages + stages)
+    if len(stages) < 2:
+        return iterator
+    return fused(node, stages)
+
+
+class fused(BaseItertool):
+    """fused(source, stages) --> fused object
+
+    Return the elements of source passed through `stages`, a list of
+    ``(kind, function)`` pairs applied in order, as built by :func:`fuse`.
+    A stage maps elements, maps their unpacked arguments, or drops
+    elements failing or passing a predicate, `kind` being `imap`,
+    `starmap`, `ifilter` or `ifilterfalse`.
+
+    The source iterator and the stages are pickled, the same state as that
+    of the equivalent tree returned by :meth:`unfuse`.
+    """
+    def __init__(self, source, stages):
+        kinds = dict((cls, kind) for kind, cls in _CLASSES.items())
+        self._source = iter_(source)
+        self._stages = []
+        for kind, function in stages:
+            if kind in kinds:
+                kind = kinds[kind]
+            elif kind not in _CLASSES:
+                raise ValueError("unknown kind of stage: {}".format(kind))
+            self._stages.append((kind, function))
+
+    def unfuse(self):
+        """Return the equivalent tree of separate iterators."""
+        node = self._source
+        for kind, function in self._stages:
+            node = _CLASSES[kind](function, node)
+        return node
+
+    def __next__(self):
+        source, stages = self._source, self._stages
+        while True:
+            value = next(source)
+            for kind, function in stages:
+                if kind == _MAP:
+                    value = function(value)
+                elif kind == _STARMAP:
+                    value = function(*value)
+                elif kind == _FILTER:
+                    if not function(value):
+                        break
+                elif function(value):
+                    break
+            else:
+                return value
@@ -1,45 +1,92 @@
 from .base import BaseItertool
-from .iter_dispatch import iter_
+from .chunked import (
+    VectorizedMixin, vectorized_new, check_scalar_kwargs, pop_batch_size,
+    as_chunkable, check_length, require_numpy
+)
+from .iter_dispatch import iter_, numpy
+
+
+def _resume_old(groupby_obj, grouper):
+    """Complete unpickling a `groupby` and its current `_grouper` pickled
+    before groupby was redesigned, once both have been given their state.
+
+    The grouper held the group in progress back then: its first element
+    until it was returned, and the first element of the next group once
+    it was read.
+    """
+    del groupby_obj._old_grouper
+    old = grouper.__dict__.pop('_old_state')
+    groupby_obj._target_key = old['_key']
+    if not old['_initialized']:
+        value = old['_value']
+    elif old['_done'] and not old['stream_ended']:
+        value = old['terminal_value']
+    else:
+        return
+    groupby_obj._has_current = True
+    groupby_obj._current_value = value
+    groupby_obj._current_key = groupby_obj.key(value)
 
 
 class _grouper(BaseItertool):
-    def __init__(self, value, iterator, groupby_obj):
-        self._value = value
+    """The iterator over a single group, drawing from its `groupby`.
+
+    It only refers to the `groupby` object and not the other way around,
+    and stops as soon as the `groupby` moves on to another group.
+    """
+    def __init__(self, groupby_obj, key, group):
         self._groupby = groupby_obj
-        self._key = self._groupby.key(self._value)
-        self._initialized = False
-        self._iterator = iterator
-        self.stream_ended = False
-        self._done = False
+        self._key = key
+        self._group = group
 
     def __next__(self):
-        if not self._initialized:
-            self._initialized = True
-            return self._value
-        else:
-            if self._done:
-                raise StopIteration
-            try:
-                value = next(self._iterator)
-            except StopIteration:
-                self.stream_ended = True
-                self._done = True
-                raise
-            if self._groupby.key(value) != self._key:
-                self.terminal_value = value
-                self._done = True
-                raise StopIteration
-            return value
+        groupby_obj = self._groupby
+        if groupby_obj._group != self._group:
+            raise StopIteration
+        if not groupby_obj._has_current:
+            groupby_obj._advance()
+        if groupby_obj._current_key != self._key:
+            raise StopIteration
+        groupby_obj._has_current = False
+        return groupby_obj._current_value
+
+    def __setstate__(self, state):
+        if '_initialized' not in state:
+            self.__dict__.update(state)
+            return
+        # Pickled before groupby was redesigned. Only the current grouper
+        # can have been left unfinished.
+        self._groupby = state['_groupby']
+        self._key = state['_key']
+        self._group = 0 if state['_done'] else 1
+        self._old_state = state
+        if getattr(self._groupby, '_old_grouper', None) is self:
+            _resume_old(self._groupby, self)
 
 
 class groupby(BaseItertool):
     """groupby(iterable[, keyfunc]) -> create an iterator which returns
     (key, sub-iterator) grouped by each value of key(value).
+
+    The key is evaluated once per element. With ``vectorized=True``, the
+    iterable must be a sequence such as a NumPy array, and keyfunc (if
+    given) is applied to slices of up to `batch_size` (default 1024)
+    elements, returning an array of keys. Run boundaries are then found a
+    slice at a time, and each group is returned as a slice of the input
+    (a view, for arrays) rather than as an iterator.
     """
-    def __init__(self, iterable, key=None):
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(groupby, cls, kwargs)
+
+    def __init__(self, iterable, key=None, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._keyfunc = key
         self._iterator = iter_(iterable)
-        self._current_key = self._initial_key = object()
+        self._has_current = False
+        self._current_value = self._current_key = None
+        # The key of the current group; valid once _group > 0.
+        self._target_key = None
+        self._group = 0
 
     def key(self, value):
         if self._keyfunc is None:
@@ -47,19 +94,102 @@ class groupby(BaseItertool):
         else:
             return self._keyfunc(value)
 
+    def _advance(self):
+        """Read the next element and compute its key."""
+        self._has_current = False
+        self._current_value = next(self._iterator)
+        self._current_key = self.key(self._current_value)
+        self._has_current = True
+
     def __next__(self):
-        if not hasattr(self, '_current_grouper'):
-            value = next(self._iterator)
-            self._current_grouper = _grouper(value, self._iterator, self)
-            return self.key(value), self._current_grouper
-        else:
-            while True:
-                try:
-                    next(self._current_grouper)
-                except StopIteration:
-                    break
-            if self._current_grouper.stream_ended:
-                raise StopIteration
-            value = self._current_grouper.terminal_value
-            self._current_grouper = _grouper(value, self._iterator, self)
-            return self.key(value), self._current_grouper
+        if not self._has_current:
+            self._advance()
+        while self._group > 0 and self._current_key == self._target_key:
+            # Skip what remains of the previous group.
+            self._advance()
+        self._target_key = self._current_key
+        self._group += 1
+        return self._current_key, _grouper(self, self._target_key,
+                                           self._group)
+
+    def __setstate__(self, state):
+        if '_initial_key' not in state:
+            self.__dict__.update(state)
+            return
+        # Pickled before groupby was redesigned, with the group in
+        # progress held by its grouper, which may get its state first.
+        self._keyfunc = state['_keyfunc']
+        self._iterator = state['_iterator']
+        self._has_current = False
+        self._current_value = self._current_key = None
+        self._target_key = None
+        self._group = 0
+        grouper = state.get('_current_grouper')
+        if grouper is not None:
+            self._group = 1
+            self._old_grouper = grouper
+            if '_old_state' in grouper.__dict__:
+                _resume_old(self, grouper)
+
+
+class _vectorized_groupby(VectorizedMixin, groupby):
+    """The ``vectorized=True`` variant of `groupby`.
+
+    The keys of one chunk, starting at `_chunk_start`, the offsets in it at
+    which the key changes, and the index of the next such offset are
+    cached. Chunks are only loaded at the start of a group, or of a chunk.
+    """
+    _cached = ('_keys', '_boundaries', '_following', '_chunk_start')
+
+    def __init__(self, iterable, key=None, **kwargs):
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy('groupby')
+        self._keyfunc = key
+        self._sequence = as_chunkable(iterable)
+        self._length = len(self._sequence)
+        self._position = 0
+        self._keys = self._boundaries = None
+        self._following = self._chunk_start = None
+
+    def _load(self, start):
+        """Compute the keys of the chunk starting at `start`."""
+        stop = min(start + self._batch_size, self._length)
+        chunk = self._sequence[start:stop]
+        keys = numpy.asarray(chunk if self._keyfunc is None
+                             else self._keyfunc(chunk))
+        check_length(keys, stop - start)
+        changed = keys[1:] != keys[:-1]
+        if changed.ndim > 1:
+            changed = changed.reshape(len(changed), -1).any(axis=1)
+        self._keys = keys
+        self._boundaries = (numpy.flatnonzero(changed) + 1).tolist()
+        self._following = 0
+        self._chunk_start = start
+
+    def _run_end(self, key):
+        """Return the end of the run of `key` in progress."""
+        while True:
+            if self._following < len(self._boundaries):
+                self._following += 1
+                return (self._chunk_start +
+                        self._boundaries[self._following - 1])
+            start = self._chunk_start + len(self._keys)
+            if start >= self._length:
+                return self._length
+            self._load(start)
+            if numpy.any(self._keys[0] != key):
+                return start
+
+    def __next__(self):
+        start = self._position
+        if start >= self._length:
+            raise StopIteration
+        if self._keys is None or start == self._chunk_start + len(self._keys):
+            self._load(start)
+        key = self._keys[start - self._chunk_start]
+        self._position = self._run_end(key)
+        return key, self._sequence[start:self._position]
+
+
+groupby._vectorized = _vectorized_groupby
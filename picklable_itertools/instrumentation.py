@@ -0,0 +1,272 @@
+"""Optional per-iterator profiling.
+
+While instrumentation is enabled, the `__next__` and `_next_or` methods
+of every :class:`BaseItertool` subclass (and of `tee` iterators) are
+replaced by wrappers recording, for every iterator object, the number of
+calls, the number of times it was found exhausted (raising StopIteration,
+or returning the default of `_next_or`), and the time spent in it both
+including and excluding nested iterators (cumulative and self time).
+Disabling it puts the original methods back, so instrumentation costs
+nothing while it is off.
+
+Use the :func:`instrument` context manager::
+
+    with instrument() as profile:
+        for batch in pipeline:
+            ...
+    print(profile.report())
+
+or set the environment variable ``PICKLABLE_ITERTOOLS_INSTRUMENT=1``
+before importing the package to profile the whole process and print a
+report to stderr at exit.
+
+Only classes defined when instrumentation is enabled are wrapped. Profiles
+only hold weak references to iterators: once one is garbage collected, its
+statistics are merged with those of the other collected iterators of its
+class.
+"""
+from __future__ import print_function
+import atexit
+import contextlib
+import functools
+import os
+import sys
+from timeit import default_timer
+import weakref
+
+from .base import BaseItertool
+from .tee import tee_iterator
+
+__all__ = ['instrument', 'enable', 'disable', 'get_profile', 'Profile',
+           'NodeStats']
+
+ENVIRONMENT_VARIABLE = 'PICKLABLE_ITERTOOLS_INSTRUMENT'
+
+# The methods through which iterators are advanced.
+_METHODS = ('__next__', '_next_or')
+
+_profile = None
+_originals = {}
+_inherited = set()
+
+
+class NodeStats(object):
+    """Statistics recorded for a single iterator object, or merged for the
+    garbage collected iterators of one class.
+
+    `name` describes the iterator, or the class. `node` is the iterator
+    itself, or None once it has been collected.
+    """
+    __slots__ = ['name', 'calls', 'stops', 'total_time', 'self_time',
+                 '_ref']
+
+    def __init__(self, name, ref=None):
+        self.name = name
+        self.calls = 0
+        self.stops = 0
+        self.total_time = 0.
+        self.self_time = 0.
+        self._ref = ref
+
+    @property
+    def node(self):
+        return None if self._ref is None else self._ref()
+
+    @property
+    def items(self):
+        """Number of items the iterator produced."""
+        return self.calls - self.stops
+
+    def _merge(self, other):
+        self.calls += other.calls
+        self.stops += other.stops
+        self.total_time += other.total_time
+        self.self_time += other.self_time
+
+    def __repr__(self):
+        return ('<NodeStats for {}: {} calls, {} stops, {:.6f}s total, '
+                '{:.6f}s self>'.format(self.name, self.calls, self.stops,
+                                       self.total_time, self.self_time))
+
+
+class Profile(object):
+    """Statistics recorded while instrumentation was enabled."""
+    def __init__(self):
+        # Keyed by id(). Nodes are only weakly referenced, and their entry
+        # is moved to `_collected`, keyed by class, once they are gone.
+        self._stats = {}
+        self._collected = {}
+        self._stack = []
+
+    def _record(self, node):
+        stats = self._stats.get(id(node))
+        if stats is None:
+            collect = functools.partial(self._collect, id(node),
+                                        type(node).__name__)
+            stats = self._stats[id(node)] = NodeStats(
+                _describe_node(node), weakref.ref(node, collect))
+        return stats
+
+    def _collect(self, key, class_name, ref):
+        stats = self._stats.get(key)
+        if stats is None or stats._ref is not ref:
+            return
+        del self._stats[key]
+        merged = self._collected.get(class_name)
+        if merged is None:
+            merged = self._collected[class_name] = NodeStats(
+                '{} (collected)'.format(class_name))
+        merged._merge(stats)
+
+    def stats(self, node):
+        """Return the :class:`NodeStats` for `node`, or None if unseen."""
+        return self._stats.get(id(node))
+
+    def __iter__(self):
+        # Copied, as nodes can be collected while iterating.
+        return iter(list(self._stats.values()) +
+                    list(self._collected.values()))
+
+    def __len__(self):
+        return len(self._stats) + len(self._collected)
+
+    def report(self):
+        """Return a table of all nodes, by decreasing self time."""
+        lines = ["{:<40} {:>10} {:>10} {:>12} {:>12}".format(
+            'node', 'calls', 'stops', 'total (s)', 'self (s)')]
+        for stats in sorted(self, key=lambda s: -s.self_time):
+            lines.append("{:<40} {:>10} {:>10} {:>12.6f} {:>12.6f}".format(
+                stats.name, stats.calls, stats.stops,
+                stats.total_time, stats.self_time))
+        return '\n'.join(lines)
+
+
+def _describe_node(node):
+    return '{}@{:x}'.format(type(node).__name__, id(node))
+
+
+def _instrumented(method, name):
+    """Wrap `method`, the `__next__` or `_next_or` method of a class."""
+    next_or = name == '_next_or'
+
+    def wrapper(self, *args):
+        profile = _profile
+        stack = profile._stack
+        if stack and stack[-1][0] is self:
+            # A call through super(), a recursive call on the same node, or
+            # one of its `__next__` and `_next_or` methods calling the other.
+            return method(self, *args)
+        frame = [self, 0.]
+        stack.append(frame)
+        stopped = False
+        start = default_timer()
+        try:
+            value = method(self, *args)
+            stopped = next_or and value is args[0]
+            return value
+        except StopIteration:
+            stopped = True
+            raise
+        finally:
+            elapsed = default_timer() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            stats = profile._record(self)
+            stats.calls += 1
+            stats.stops += stopped
+            stats.total_time += elapsed
+            stats.self_time += elapsed - frame[1]
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _iterator_classes():
+    # Make sure every class the package defines exists before walking.
+    from . import extras  # noqa
+    classes = [tee_iterator]
+    pending = [BaseItertool]
+    while pending:
+        cls = pending.pop()
+        classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def _own_method(cls, name):
+    """The method `cls` defines, or inherits from a mixin, as `name`."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            if klass is cls or not issubclass(klass, BaseItertool):
+                return klass.__dict__[name]
+            return None
+
+
+def enable(profile=None):
+    """Start recording into `profile` (a new :class:`Profile` by default).
+
+    Returns the profile being recorded into. Raises RuntimeError if
+    instrumentation is already enabled.
+    """
+    global _profile
+    if _profile is not None:
+        raise RuntimeError("instrumentation is already enabled")
+    _profile = profile if profile is not None else Profile()
+    for cls in _iterator_classes():
+        for name in _METHODS:
+            method = _own_method(cls, name)
+            if (method is not None and (cls, name) not in _originals and
+                    not getattr(method, '__isabstractmethod__', False)):
+                _originals[cls, name] = method
+                if name not in cls.__dict__:
+                    _inherited.add((cls, name))
+                setattr(cls, name, _instrumented(method, name))
+    return _profile
+
+
+def disable():
+    """Stop recording, restoring the original methods.
+
+    Returns the profile that was being recorded into, or None if
+    instrumentation was not enabled.
+    """
+    global _profile
+    for (cls, name), method in _originals.items():
+        if (cls, name) in _inherited:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, method)
+    _inherited.clear()
+    _originals.clear()
+    profile, _profile = _profile, None
+    return profile
+
+
+def get_profile():
+    """Return the profile being recorded into, or None."""
+    return _profile
+
+
+@contextlib.contextmanager
+def instrument(profile=None):
+    """Context manager enabling instrumentation; yields the profile."""
+    profile = enable(profile)
+    try:
+        yield profile
+    finally:
+        disable()
+
+
+def _report_at_exit():
+    profile = get_profile()
+    if profile is not None:
+        print(profile.report(), file=sys.stderr)
+
+
+def enable_from_environment():
+    """Enable instrumentation if the environment variable asks for it."""
+    if os.environ.get(ENVIRONMENT_VARIABLE, '0') not in ('', '0'):
+        if get_profile() is None:
+            enable()
+            atexit.register(_report_at_exit)
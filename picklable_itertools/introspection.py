@@ -0,0 +1,221 @@
+"""Inspection of the structure of iterator pipelines.
+
+:func:`describe` walks an iterator and the iterators it draws from into a
+graph that can be rendered as text or in Graphviz DOT format, optionally
+annotated with the throughput of each node and the share of time spent in
+it, measured on a sample of the pipeline's output.
+"""
+import collections
+import copy
+from timeit import default_timer
+
+import six
+
+from .instrumentation import disable, enable, get_profile, instrument
+from .tee import tee_manager
+
+__all__ = ['describe', 'Pipeline', 'PipelineNode']
+
+# Attributes naming the function an iterator applies, used in labels.
+_FUNCTION_ATTRIBUTES = ('_function', '_predicate', '_func', '_keyfunc',
+                        '_key')
+
+
+def _is_iterator(obj):
+    return (hasattr(obj, '__next__' if six.PY3 else 'next') and
+            hasattr(obj, '__iter__'))
+
+
+def _is_node(obj):
+    return isinstance(obj, tee_manager) or _is_iterator(obj)
+
+
+def _children(obj):
+    """Iterators (and tee managers) referenced by the attributes of `obj`."""
+    found = []
+    for value in getattr(obj, '__dict__', {}).values():
+        if _is_node(value):
+            found.append(value)
+        elif (isinstance(value, (tuple, list, collections.deque)) and
+                len(value) > 0 and _is_node(value[0])):
+            # Only containers of iterators, not buffers of data.
+            found.extend(item for item in value if _is_node(item))
+    return found
+
+
+def _label(obj):
+    label = type(obj).__name__
+    for attribute in _FUNCTION_ATTRIBUTES:
+        function = getattr(obj, '__dict__', {}).get(attribute)
+        if callable(function):
+            name = getattr(function, '__name__', type(function).__name__)
+            return '{}({})'.format(label, name)
+    return label
+
+
+class PipelineNode(object):
+    """One iterator in a :class:`Pipeline`.
+
+    Attributes
+    ----------
+    node : object
+        The iterator (or tee manager) itself.
+    label : str
+        Its type name, with the name of the function it applies, if any.
+    children : list of PipelineNode
+        The nodes it draws from.
+    stats : NodeStats or None
+        Instrumentation statistics, if the pipeline was sampled.
+    items_per_sec : float or None
+        Items produced per second of cumulative time spent in the node.
+    time_fraction : float or None
+        Fraction of the sampled wall time spent in the node itself.
+    """
+    def __init__(self, index, node):
+        self.index = index
+        self.node = node
+        self.label = _label(node)
+        self.children = []
+        self.stats = None
+        self.items_per_sec = None
+        self.time_fraction = None
+
+    def annotation(self):
+        if self.stats is None:
+            return ''
+        rate = ('{:,.0f} items/s'.format(self.items_per_sec)
+                if self.items_per_sec is not None else '- items/s')
+        return '{}, {:.1%} of time'.format(rate, self.time_fraction)
+
+
+class Pipeline(object):
+    """The graph of iterators making up a pipeline.
+
+    Nodes referenced from several places, such as the source shared by the
+    iterators returned by `tee`, appear only once.
+    """
+    def __init__(self, root):
+        self.nodes = []
+        nodes_by_id = {}
+        on_path = set()
+
+        def visit(obj):
+            node = PipelineNode(len(self.nodes), obj)
+            self.nodes.append(node)
+            nodes_by_id[id(obj)] = node
+            on_path.add(id(obj))
+            for child in _children(obj):
+                if id(child) in on_path:
+                    continue  # A back-reference, e.g. from a groupby group.
+                if id(child) in nodes_by_id:
+                    node.children.append(nodes_by_id[id(child)])
+                else:
+                    node.children.append(visit(child))
+            on_path.discard(id(obj))
+            return node
+
+        self.root = visit(root)
+
+    def annotate(self, profile, wall_time=None):
+        """Attach statistics from an instrumentation `profile`.
+
+        `wall_time` defaults to the total self time of all profiled nodes.
+        """
+        if wall_time is None:
+            wall_time = sum(stats.self_time for stats in profile)
+        for node in self.nodes:
+            node.stats = profile.stats(node.node)
+            if node.stats is None:
+                continue
+            node.items_per_sec = (node.stats.items / node.stats.total_time
+                                  if node.stats.total_time > 0 else None)
+            node.time_fraction = (node.stats.self_time / wall_time
+                                  if wall_time > 0 else 0.)
+
+    def bottleneck(self):
+        """Return the annotated node with the largest share of time."""
+        annotated = [node for node in self.nodes if node.stats is not None]
+        if not annotated:
+            return None
+        return max(annotated, key=lambda node: node.time_fraction)
+
+    def text(self):
+        """Render the pipeline as an indented tree, consumers first."""
+        lines = []
+        seen = set()
+
+        def render(node, depth):
+            annotation = node.annotation()
+            line = '{}{} #{}'.format('  ' * depth, node.label, node.index)
+            if annotation:
+                line += ' [{}]'.format(annotation)
+            if node.index in seen:
+                lines.append(line + ' (shared, see above)')
+                return
+            seen.add(node.index)
+            lines.append(line)
+            for child in node.children:
+                render(child, depth + 1)
+
+        render(self.root, 0)
+        return '\n'.join(lines)
+
+    def dot(self):
+        """Render the pipeline in Graphviz DOT format.
+
+        Edges point in the direction data flows, from sources to consumers.
+        """
+        lines = ['digraph pipeline {', '  node [shape=box];']
+        for node in self.nodes:
+            label = node.label
+            if node.stats is not None:
+                label += '\\n' + node.annotation()
+            lines.append('  n{} [label="{}"];'.format(
+                node.index, label.replace('"', '\\"')))
+        for node in self.nodes:
+            for child in node.children:
+                lines.append('  n{} -> n{};'.format(child.index, node.index))
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.text()
+
+
+def describe(iterator, sample=None, profile=None):
+    """describe(iterator, sample=None, profile=None) --> Pipeline
+
+    Return the :class:`Pipeline` of iterators `iterator` draws from.
+
+    If `sample` is given, a copy of `iterator` is made (leaving the
+    original untouched) and up to `sample` items are drawn from it with
+    instrumentation enabled; the graph of the copy is returned, annotated
+    with each node's items per second and share of the wall time. A
+    profile already being recorded into is left out of the sample and
+    resumes recording afterwards.
+    Alternatively, pass a `profile` recorded while consuming `iterator` to
+    annotate its graph with that.
+    """
+    if sample is not None:
+        iterator = copy.deepcopy(iterator)
+        # Record into a fresh profile, suspending any active one meanwhile.
+        active = disable() if get_profile() is not None else None
+        try:
+            with instrument() as profile:
+                start = default_timer()
+                for _ in six.moves.xrange(sample):
+                    try:
+                        next(iterator)
+                    except StopIteration:
+                        break
+                wall_time = default_timer() - start
+        finally:
+            if active is not None:
+                enable(active)
+        pipeline = Pipeline(iterator)
+        pipeline.annotate(profile, wall_time)
+        return pipeline
+    pipeline = Pipeline(iterator)
+    if profile is not None:
+        pipeline.annotate(profile)
+    return pipeline
@@ -7,9 +7,13 @@ try:
 except ImportError:
     numpy = None
     NUMPY_AVAILABLE = False
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 
-from .base import BaseItertool
+from .base import BaseItertool, EXHAUSTED, next_or
 
 
 def iter_(obj):
@@ -41,12 +45,62 @@ def iter_(obj):
     return iter(obj)
 
 
+def as_sequence(obj):
+    """Find an indexable sequence backing `obj`, if there is one.
+
+    Returns a `(sequence, position)` pair such that iterating over `obj`
+    yields `sequence[position:]`, or `(None, None)` if `obj` is not known
+    to be backed by a sequence. Recognizes sequences themselves (including
+    NumPy arrays) as well as :class:`ordered_sequence_iterator` and
+    :class:`range_iterator` instances.
+    """
+    if isinstance(obj, Sequence) or (NUMPY_AVAILABLE and
+                                     isinstance(obj, numpy.ndarray)):
+        return obj, 0
+    if isinstance(obj, ordered_sequence_iterator):
+        return obj._sequence, obj._position
+    if isinstance(obj, range_iterator):
+        return six.moves.xrange(obj._n, obj._stop, obj._step), 0
+    return None, None
+
+
+def advance(iterator, n):
+    """Advance `iterator` by `n` elements, discarding them.
+
+    Iterators over sequences and ranges are repositioned directly; anything
+    else is stepped through. Returns the number of elements skipped, which
+    is less than `n` only if `iterator` was exhausted.
+    """
+    if isinstance(iterator, ordered_sequence_iterator):
+        n = max(0, min(n, len(iterator._sequence) - iterator._position))
+        iterator._position += n
+        return n
+    if isinstance(iterator, range_iterator):
+        n = min(n, len(six.moves.xrange(iterator._n, iterator._stop,
+                                        iterator._step)))
+        iterator._n += iterator._step * n
+        return n
+    for i in six.moves.xrange(n):
+        if next_or(iterator, EXHAUSTED) is EXHAUSTED:
+            return i
+    return n
+
+
 class range_iterator(BaseItertool):
     """A picklable range iterator for Python 2."""
     def __init__(self, xrange_):
         self._start, self._stop, self._step = xrange_.__reduce__()[1]
         self._n = self._start
 
+    def _next_or(self, default):
+        if (self._step > 0 and self._n < self._stop or
+                self._step < 0 and self._n > self._stop):
+            value = self._n
+            self._n += self._step
+            return value
+        else:
+            return default
+
     def __next__(self):
         if (self._step > 0 and self._n < self._stop or
                 self._step < 0 and self._n > self._stop):
@@ -62,10 +116,10 @@ class file_iterator(BaseItertool):
     def __init__(self, f):
         self._f = f
 
-    def __next__(self):
+    def _next_or(self, default):
         line = self._f.readline()
         if not line:
-            raise StopIteration
+            return default
         return line
 
     def __getstate__(self):
@@ -84,6 +138,14 @@ class ordered_sequence_iterator(BaseItertool):
         self._sequence = sequence
         self._position = 0
 
+    def _next_or(self, default):
+        if self._position < len(self._sequence):
+            value = self._sequence[self._position]
+            self._position += 1
+            return value
+        else:
+            return default
+
     def __next__(self):
         if self._position < len(self._sequence):
             value = self._sequence[self._position]
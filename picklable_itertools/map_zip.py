@@ -1,4 +1,8 @@
-from .base import BaseItertool
+from .base import BaseItertool, EXHAUSTED, has_next_or
+from .chunked import (
+    VectorizedMixin, vectorized_new, check_scalar_kwargs, pop_batch_size,
+    as_chunkable, check_length
+)
 from .iter_dispatch import iter_
 
 
@@ -7,8 +11,19 @@ class imap(BaseItertool):
 
     Make an iterator that computes the function using arguments from
     each of the iterables.  Stops when the shortest iterable is exhausted.
+
+    With ``vectorized=True``, the iterables must be sequences such as NumPy
+    arrays, and `func` is called on aligned slices of up to `batch_size`
+    (default 1024) elements of each, returning a sequence of as many
+    results. These are returned one at a time or, with ``batched=True``,
+    a slice at a time. Only the position is pickled; results for the
+    current slice are recomputed if needed.
     """
-    def __init__(self, function, *iterables):
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(imap, cls, kwargs)
+
+    def __init__(self, function, *iterables, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._function = function
         self._iterables = tuple(iter_(it) for it in iterables)
 
@@ -28,8 +43,13 @@ class starmap(imap):
 
     Return an iterator whose values are returned from the function evaluated
     with a argument tuple taken from the given sequence.
+
+    With ``vectorized=True``, `sequence` must be a 2-D NumPy array whose
+    rows are the argument tuples, and `function` is called with the
+    columns of slices of up to `batch_size` rows; see `imap`.
     """
-    def __init__(self, function, iterable):
+    def __init__(self, function, iterable, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._iterables = (iter_(iterable),)
         self._function = function
 
@@ -37,6 +57,63 @@ class starmap(imap):
         return self._function(*args[0])
 
 
+class _vectorized_imap(VectorizedMixin, imap):
+    """The ``vectorized=True`` variant of `imap`."""
+    _cached = ('_chunk', '_chunk_start')
+
+    def __init__(self, function, *iterables, **kwargs):
+        self._batched = kwargs.pop('batched', False)
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        if function is None:
+            raise ValueError("vectorized mapping requires a function")
+        self._function = function
+        self._sequences = tuple(as_chunkable(it) for it in iterables)
+        self._length = min(len(seq) for seq in self._sequences)
+        self._position = 0
+        self._chunk = self._chunk_start = None
+
+    def _arguments(self, start, stop):
+        return tuple(seq[start:stop] for seq in self._sequences)
+
+    def _compute(self, start):
+        stop = min(start + self._batch_size, self._length)
+        results = self._function(*self._arguments(start, stop))
+        check_length(results, stop - start)
+        return results
+
+    def __next__(self):
+        position = self._position
+        if position >= self._length:
+            raise StopIteration
+        if self._batched:
+            results = self._compute(position)
+            self._position += len(results)
+            return results
+        chunk = self._chunk
+        if chunk is None or position >= self._chunk_start + len(chunk):
+            chunk = self._chunk = self._compute(position)
+            self._chunk_start = position
+        self._position += 1
+        return chunk[position - self._chunk_start]
+
+
+class _vectorized_starmap(_vectorized_imap, starmap):
+    """The ``vectorized=True`` variant of `starmap`."""
+    def __init__(self, function, iterable, **kwargs):
+        super(_vectorized_starmap, self).__init__(function, iterable,
+                                                  **kwargs)
+        if getattr(self._sequences[0], 'ndim', None) != 2:
+            raise TypeError("vectorized starmap requires a 2-D array")
+
+    def _arguments(self, start, stop):
+        return tuple(self._sequences[0][start:stop].T)
+
+
+imap._vectorized = _vectorized_imap
+starmap._vectorized = _vectorized_starmap
+
+
 def izip(*iterables):
     """zip(iter1 [,iter2 [...]]) --> zip object
 
@@ -70,6 +147,25 @@ class izip_longest(BaseItertool):
                 ", ".join(kwargs)))
 
         self._iterables = tuple(iter_(it) for it in iterables)
+        self._natives = tuple(has_next_or(it) for it in self._iterables)
+
+    def _next_or(self, default):
+        found_any = False
+        result = []
+        for it, native in zip(self._iterables, self._natives):
+            if native:
+                value = it._next_or(EXHAUSTED)
+            else:
+                value = next(it, EXHAUSTED)
+            if value is EXHAUSTED:
+                result.append(self._fillvalue)
+            else:
+                result.append(value)
+                found_any = True
+        if found_any:
+            return tuple(result)
+        else:
+            return default
 
     def __next__(self):
         found_any = False
@@ -84,3 +180,8 @@ class izip_longest(BaseItertool):
             return tuple(result)
         else:
             raise StopIteration
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Objects pickled before _next_or existed have no flags.
+        self._natives = tuple(has_next_or(it) for it in self._iterables)
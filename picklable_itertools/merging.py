@@ -0,0 +1,369 @@
+"""Picklable iterators combining several sorted iterables."""
+import bisect
+import heapq
+import itertools
+import os
+import tempfile
+
+from six.moves import cPickle
+
+from .base import BaseItertool
+from .iter_dispatch import iter_, as_sequence, ordered_sequence_iterator
+
+
+def _heapreplace_max(heap, item):
+    returned = heap[0]
+    heap[0] = item
+    heapq._siftup_max(heap, 0)
+    return returned
+
+
+def _heappop_max(heap):
+    last = heap.pop()
+    if heap:
+        returned, heap[0] = heap[0], last
+        heapq._siftup_max(heap, 0)
+        return returned
+    return last
+
+
+# The max-heap counterparts of the heapq functions, which are only private
+# (and partly missing on Python 2) before Python 3.14.
+_heapify_max = getattr(heapq, 'heapify_max', None) or heapq._heapify_max
+_heapreplace_max = (getattr(heapq, 'heapreplace_max', None) or
+                    getattr(heapq, '_heapreplace_max', _heapreplace_max))
+_heappop_max = (getattr(heapq, 'heappop_max', None) or
+                getattr(heapq, '_heappop_max', _heappop_max))
+
+
+class merge(BaseItertool):
+    """merge(*iterables, key=None, reverse=False) --> merge object
+
+    Merge multiple sorted inputs into a single sorted output, like
+    `heapq.merge`. Equal elements are returned in the order of the
+    iterables they come from. If `reverse` is true, the inputs must be
+    sorted from largest to smallest.
+
+    The state is a heap of ``[key, order, head]`` entries, one per input
+    that is not exhausted, along with the inputs' iterators; each element
+    costs O(log k) heap operations for k inputs. Without `key` or
+    `reverse`, runs of elements of a sequence (e.g. a list or an array)
+    that all precede the other inputs' heads are found by bisection and
+    returned without touching the heap.
+    """
+    def __init__(self, *iterables, **kwargs):
+        self._key = kwargs.pop('key', None)
+        self._reverse = kwargs.pop('reverse', False)
+        if len(kwargs) > 0:
+            raise ValueError("Unrecognized keyword arguments: {}".format(
+                ", ".join(kwargs)))
+        self._iters = [self._iterator(iterable) for iterable in iterables]
+        # Filled on the first call, so that no input is read before then.
+        self._heap = None
+        # Whether the head at the top of the heap was already returned.
+        self._stale = False
+        # How many more elements to return straight from the top input.
+        self._run = 0
+
+    def _iterator(self, iterable):
+        sequence, position = as_sequence(iterable)
+        if (sequence is None or self._key is not None or self._reverse or
+                isinstance(iterable, ordered_sequence_iterator)):
+            return iter_(iterable)
+        it = ordered_sequence_iterator(sequence)
+        it._position = position
+        return it
+
+    def _initialize(self):
+        # With a max-heap, negating the order keeps ties in input order.
+        direction = -1 if self._reverse else 1
+        heap = []
+        for index, it in enumerate(self._iters):
+            try:
+                head = next(it)
+            except StopIteration:
+                self._iters[index] = None
+                continue
+            key = head if self._key is None else self._key(head)
+            heap.append([key, index * direction, head])
+        if self._reverse:
+            _heapify_max(heap)
+        else:
+            heapq.heapify(heap)
+        self._heap = heap
+
+    def _refresh(self):
+        """Replace the head at the top of the heap with the next one."""
+        heap = self._heap
+        entry = heap[0]
+        index = abs(entry[1])
+        self._stale = False
+        try:
+            head = next(self._iters[index])
+        except StopIteration:
+            self._iters[index] = None
+            if self._reverse:
+                _heappop_max(heap)
+            else:
+                heapq.heappop(heap)
+            return
+        entry[0] = head if self._key is None else self._key(head)
+        entry[2] = head
+        if len(heap) > 1:
+            if self._reverse:
+                _heapreplace_max(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+    def _find_run(self, entry):
+        """Count the elements following `entry`'s head that precede all
+        other heads, if its input is a sequence."""
+        it = self._iters[entry[1]]
+        if not isinstance(it, ordered_sequence_iterator):
+            return 0
+        heap = self._heap
+        bound = heap[1] if len(heap) < 3 or heap[1] < heap[2] else heap[2]
+        sequence, position = it._sequence, it._position
+        if position >= len(sequence):
+            return 0
+        # Equal elements go first if this input comes first.
+        if entry[1] < bound[1]:
+            if not sequence[position] <= bound[0]:
+                return 0
+            end = bisect.bisect_right(sequence, bound[0], position)
+        else:
+            if not sequence[position] < bound[0]:
+                return 0
+            end = bisect.bisect_left(sequence, bound[0], position)
+        return end - position
+
+    def __next__(self):
+        if self._heap is None:
+            self._initialize()
+        if self._run > 0:
+            self._run -= 1
+            it = self._iters[self._heap[0][1]]
+            it._position += 1
+            return it._sequence[it._position - 1]
+        if self._stale:
+            self._refresh()
+        heap = self._heap
+        if not heap:
+            raise StopIteration
+        entry = heap[0]
+        self._stale = True
+        if len(heap) > 1 and self._key is None and not self._reverse:
+            self._run = self._find_run(entry)
+        return entry[2]
+
+
+class _run_reader(BaseItertool):
+    """Iterate over the objects pickled one after another in a file.
+
+    Only the path and the offset of the next object are pickled.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._offset = 0
+        self._file = None
+
+    def __next__(self):
+        if self._file is None:
+            self._file = open(self._path, 'rb')
+            self._file.seek(self._offset)
+        try:
+            value = cPickle.load(self._file)
+        except EOFError:
+            self.close()
+            raise StopIteration
+        self._offset = self._file.tell()
+        return value
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+
+class external_sorted(BaseItertool):
+    """external_sorted(iterable, key=None, run_size=100000, tmpdir=None,
+                       reverse=False) --> external_sorted object
+
+    Return the elements of iterable in sorted order, like `sorted`, holding
+    no more than `run_size` of them in memory at once. The input is first
+    read `run_size` elements at a time, each such run being sorted and
+    written (pickled) to a file in `tmpdir`; the runs are then merged as
+    the output is consumed. The files are removed once it is exhausted, or
+    by calling :meth:`cleanup`.
+
+    The first element is only returned once every run is written. To
+    checkpoint during that phase, call :meth:`write_run` until it returns
+    False, pickling in between: the state is then the paths of the runs
+    written so far and the input iterator, positioned after the last run.
+    Afterwards, it is the state of the merge.
+    """
+    def __init__(self, iterable, key=None, run_size=100000, tmpdir=None,
+                 reverse=False):
+        if run_size < 1:
+            raise ValueError("run_size must be a positive integer")
+        self._iterable = iter_(iterable)
+        self._key = key
+        self._run_size = run_size
+        self._tmpdir = tmpdir
+        self._reverse = reverse
+        self._runs = []
+        self._exhausted = False
+        self._merged = None
+
+    def write_run(self):
+        """Sort the next `run_size` elements of the input into a new run.
+
+        Returns False, without writing anything, once the input is
+        exhausted.
+        """
+        if self._exhausted:
+            return False
+        items = list(itertools.islice(self._iterable, self._run_size))
+        if len(items) < self._run_size:
+            self._exhausted = True
+            if not items:
+                return False
+        items.sort(key=self._key, reverse=self._reverse)
+        handle, path = tempfile.mkstemp(prefix='external_sorted_',
+                                        suffix='.run', dir=self._tmpdir)
+        with os.fdopen(handle, 'wb') as run_file:
+            for item in items:
+                cPickle.dump(item, run_file, cPickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        return True
+
+    def cleanup(self):
+        """Remove the run files."""
+        if self._merged is not None:
+            for reader in self._merged._iters:
+                if reader is not None:
+                    reader.close()
+        for path in self._runs:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __next__(self):
+        if self._merged is None:
+            while self.write_run():
+                pass
+            self._merged = merge(*[_run_reader(path) for path in self._runs],
+                                 key=self._key, reverse=self._reverse)
+        try:
+            return next(self._merged)
+        except StopIteration:
+            self.cleanup()
+            raise
+
+
+class merge_join(BaseItertool):
+    """merge_join(left, right, left_key=None, right_key=None, how='inner')
+        --> merge_join object
+
+    Join two iterables sorted by key, returning ``(left_item, right_item)``
+    pairs of items with equal keys, in key order. Items sharing a key on
+    both sides yield every combination, left items varying slowest.
+    `right_key` defaults to `left_key`, and both to the items themselves.
+
+    With `how` set to 'left', 'right' or 'outer', items from the left, the
+    right or either side that have no match are also returned, paired with
+    None. Raises ValueError if either side turns out not to be sorted.
+
+    Both sides are advanced in lockstep, only holding the items of the
+    current key in memory, and the state is picklable.
+    """
+    _HOW = ('inner', 'left', 'right', 'outer')
+
+    def __init__(self, left, right, left_key=None, right_key=None,
+                 how='inner'):
+        if how not in self._HOW:
+            raise ValueError("how must be one of {}".format(
+                ", ".join(self._HOW)))
+        if right_key is None:
+            right_key = left_key
+        self._iters = [iter_(left), iter_(right)]
+        self._keyfuncs = [left_key, right_key]
+        self._keep = [how in ('left', 'outer'), how in ('right', 'outer')]
+        # The next unconsumed item of each side and its key, if read.
+        self._heads = [None, None]
+        self._keys = [None, None]
+        self._has_head = [False, False]
+        self._seen = [False, False]
+        self._exhausted = [False, False]
+        # The items of both sides sharing the current key, and the indices
+        # of the next combination of them to return.
+        self._groups = None
+        self._indices = [0, 0]
+
+    def _peek(self, side):
+        """Read the head of a side if needed; return whether it has one."""
+        if self._has_head[side] or self._exhausted[side]:
+            return self._has_head[side]
+        try:
+            head = next(self._iters[side])
+        except StopIteration:
+            self._exhausted[side] = True
+            return False
+        keyfunc = self._keyfuncs[side]
+        key = head if keyfunc is None else keyfunc(head)
+        if self._seen[side] and key < self._keys[side]:
+            raise ValueError("{} input of merge_join is not sorted".format(
+                ('left', 'right')[side]))
+        self._heads[side], self._keys[side] = head, key
+        self._has_head[side] = self._seen[side] = True
+        return True
+
+    def _take(self, side):
+        self._has_head[side] = False
+        return self._heads[side]
+
+    def _group(self, side):
+        key = self._keys[side]
+        group = [self._take(side)]
+        while self._peek(side) and self._keys[side] == key:
+            group.append(self._take(side))
+        return group
+
+    def _next_combination(self):
+        left, right = self._groups
+        i, j = self._indices
+        if j + 1 < len(right):
+            self._indices[1] = j + 1
+        elif i + 1 < len(left):
+            self._indices = [i + 1, 0]
+        else:
+            self._groups = None
+        return left[i], right[j]
+
+    def __next__(self):
+        while True:
+            if self._groups is not None:
+                return self._next_combination()
+            has_left, has_right = self._peek(0), self._peek(1)
+            if has_left and has_right:
+                if self._keys[0] < self._keys[1]:
+                    side = 0
+                elif self._keys[1] < self._keys[0]:
+                    side = 1
+                else:
+                    self._groups = (self._group(0), self._group(1))
+                    self._indices = [0, 0]
+                    continue
+            elif has_left or has_right:
+                side = 0 if has_left else 1
+                if not self._keep[side]:
+                    raise StopIteration
+            else:
+                raise StopIteration
+            item = self._take(side)
+            if self._keep[side]:
+                return (item, None) if side == 0 else (None, item)
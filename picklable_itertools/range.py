@@ -1,8 +1,14 @@
+import random
 import six.moves
 from numbers import Integral
-from .iter_dispatch import range_iterator
+from .iter_dispatch import (
+    range_iterator, ordered_sequence_iterator, Sequence
+)
 
-__all__ = ['xrange']
+__all__ = ['xrange', 'permuted_xrange']
+
+_MASK64 = (1 << 64) - 1
+_FEISTEL_ROUNDS = 4
 
 
 def _check_integral(value):
@@ -72,9 +78,28 @@ class xrange(object):
             raise ValueError("{} is not in range".format(i))
         return (i - self._start) // self._step
 
+    def shuffled(self, seed=None):
+        """Return a :class:`permuted_xrange` over the values of this range."""
+        return permuted_xrange(self, seed)
+
     def __len__(self):
         return len(six.moves.xrange(self._start, self._stop, self._step))
 
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            return self.__class__(self._start + start * self._step,
+                                  self._start + stop * self._step,
+                                  self._step * step)
+        _check_integral(index)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("{} object index out of range".format(
+                self.__class__.__name__))
+        return self._start + index * self._step
+
     def __reduce__(self):
         return (self.__class__, (self.start, self.stop, self.step))
 
@@ -85,3 +110,144 @@ class xrange(object):
         return (__name__.split('.')[0] + '.' + self.__class__.__name__ +
                 (str((self.start, self.stop)) if self.step == 1 else
                  str((self.start, self.stop, self.step))))
+
+
+def _feistel_round(value, key, mask):
+    value = (value * 0x9E3779B97F4A7C15 + key) & _MASK64
+    value ^= value >> 31
+    value = (value * 0xBF58476D1CE4E5B9) & _MASK64
+    value ^= value >> 29
+    return value & mask
+
+
+class permuted_xrange(object):
+    """permuted_xrange(n, seed=None) --> pseudo-random permutation of range(n)
+
+    A sequence containing the integers in [0, n) (or the values of `n`, if
+    it is an :class:`xrange`) in an order determined by `seed`. Element `i`
+    is computed on demand by pushing `i` through a keyed Feistel network
+    over the smallest even number of bits covering `n`, re-applying it
+    until the result falls inside the range ("cycle walking"). This needs
+    O(1) memory and expected O(1) time per element, both for iteration and
+    for random access.
+
+    Slicing it returns a view holding the elements at the sliced positions,
+    which is again a `permuted_xrange`.
+
+    Iterators over it pickle as just `(n, seed, position)`. If `seed` is
+    `None`, one is drawn at construction so that pickles remain
+    reproducible.
+    """
+    __slots__ = ['_range', '_seed', '_half_bits', '_half_mask', '_keys',
+                 '_positions']
+
+    def __init__(self, n, seed=None):
+        self._range = n if isinstance(n, xrange) else xrange(n)
+        if seed is None:
+            seed = random.getrandbits(63)
+        self._seed = seed
+        self._half_bits = max(1, ((len(self._range) - 1).bit_length() + 1) //
+                              2)
+        self._half_mask = (1 << self._half_bits) - 1
+        rng = random.Random(seed)
+        self._keys = tuple(rng.getrandbits(64)
+                           for _ in range(_FEISTEL_ROUNDS))
+        # For a slice, the positions in the whole permutation it holds.
+        self._positions = None
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def _encrypt(self, value):
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ _feistel_round(right, key,
+                                                       self._half_mask)
+        return (left << self._half_bits) | right
+
+    def _decrypt(self, value):
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in reversed(self._keys):
+            left, right = right ^ _feistel_round(left, key,
+                                                 self._half_mask), left
+        return (left << self._half_bits) | right
+
+    def _permute(self, index, function):
+        length = len(self._range)
+        index = function(index)
+        while index >= length:
+            index = function(index)
+        return index
+
+    def count(self, value):
+        """Return the number of occurrences of `value` (0 or 1)."""
+        try:
+            self.index(value)
+        except ValueError:
+            return 0
+        return 1
+
+    def index(self, value):
+        """Return the position of `value` in the permutation.
+
+        Raise ValueError if the value is not present.
+        """
+        position = self._permute(self._range.index(value), self._decrypt)
+        if self._positions is None:
+            return position
+        if self._positions.count(position) == 0:
+            raise ValueError("{} is not in {}".format(
+                value, self.__class__.__name__))
+        return self._positions.index(position)
+
+    def __len__(self):
+        if self._positions is None:
+            return len(self._range)
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            view = self.__class__.__new__(self.__class__)
+            for name in self.__slots__:
+                setattr(view, name, getattr(self, name))
+            positions = self._positions
+            if positions is None:
+                positions = xrange(len(self._range))
+            view._positions = positions[index]
+            return view
+        _check_integral(index)
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("{} object index out of range".format(
+                self.__class__.__name__))
+        if self._positions is not None:
+            index = self._positions[index]
+        return self._range[self._permute(index, self._encrypt)]
+
+    def __reduce__(self):
+        n = self._range
+        if n.start == 0 and n.step == 1:
+            n = n.stop
+        if self._positions is None:
+            return (self.__class__, (n, self._seed))
+        return (self.__class__, (n, self._seed), self._positions)
+
+    def __setstate__(self, positions):
+        self._positions = positions
+
+    def __iter__(self):
+        return ordered_sequence_iterator(self)
+
+    def __repr__(self):
+        positions = self._positions
+        view = ('' if positions is None else '[{}:{}:{}]'.format(
+            positions.start, positions.stop, positions.step))
+        return (__name__.split('.')[0] + '.' + self.__class__.__name__ +
+                str(self.__reduce__()[1]) + view)
+
+
+Sequence.register(xrange)
+Sequence.register(permuted_xrange)
@@ -0,0 +1,370 @@
+"""Picklable iterators that draw on a random number generator.
+
+The generator is stored on the iterator itself, so its state is pickled
+alongside everything else and a restored iterator reproduces exactly the
+same sequence of draws as the original would have.
+"""
+import bisect
+import math
+import random
+
+import six
+
+from .base import BaseItertool
+from .iter_dispatch import (
+    iter_, as_sequence, advance, ordered_sequence_iterator, range_iterator,
+    numpy, NUMPY_AVAILABLE
+)
+
+if NUMPY_AVAILABLE:
+    _NUMPY_GENERATORS = tuple(
+        getattr(numpy.random, name) for name in ('Generator', 'RandomState')
+        if hasattr(numpy.random, name))
+else:
+    _NUMPY_GENERATORS = ()
+
+
+class _UniformSource(object):
+    """A picklable source of uniform floats in [0, 1).
+
+    `seed` may be `None`, an integer, a :class:`random.Random` instance or
+    a NumPy `Generator`/`RandomState`. Generator instances are used (and
+    advanced) in place. NumPy generators are drawn from in blocks of
+    `block_size` values, the unused part of the current block being pickled
+    with the generator state.
+    """
+    def __init__(self, seed=None, block_size=1024):
+        if isinstance(seed, random.Random):
+            self._rng = seed
+            self._numpy = False
+        elif isinstance(seed, _NUMPY_GENERATORS):
+            self._rng = seed
+            self._numpy = True
+        else:
+            self._rng = random.Random(seed)
+            self._numpy = False
+        self._block_size = block_size
+        self._block = ()
+        self._position = 0
+
+    def take(self, n):
+        """Return a sequence of `n` uniform draws.
+
+        Returns a NumPy array when drawing from a NumPy generator, and a list
+        otherwise.
+        """
+        if self._numpy:
+            available = len(self._block) - self._position
+            if available >= n:
+                values = self._block[self._position:self._position + n]
+                self._position += n
+                return values
+            head = self._block[self._position:]
+            self._block, self._position = (), 0
+            return numpy.concatenate([head, self._draw(n - available)])
+        return [self._rng.random() for _ in range(n)]
+
+    def random(self):
+        """Return a single uniform draw."""
+        if not self._numpy:
+            return self._rng.random()
+        if self._position == len(self._block):
+            self._block = self._draw(self._block_size)
+            self._position = 0
+        value = self._block[self._position]
+        self._position += 1
+        return float(value)
+
+    def randbelow(self, n):
+        """Return an integer drawn uniformly from [0, n)."""
+        return int(self.random() * n)
+
+    def _draw(self, n):
+        if hasattr(self._rng, 'random_sample'):
+            return self._rng.random_sample(n)
+        return self._rng.random(n)
+
+
+class shuffle(BaseItertool):
+    """shuffle(iterable, buffer_size, seed=None) --> shuffle object
+
+    Return the elements of `iterable` in a pseudo-random order, using a
+    buffer of at most `buffer_size` elements. Each element returned is drawn
+    uniformly from the buffer and its slot refilled from the input; once
+    the input is exhausted, the buffer is drained the same way. A buffer at
+    least as long as the input yields a uniformly random permutation.
+
+    `seed` may be `None`, an integer, a :class:`random.Random` or a NumPy
+    `Generator`/`RandomState`; its state is pickled with the buffer, so a
+    restored iterator continues with exactly the same order.
+
+    When `iterable` is a NumPy array, the buffer is itself an array filled
+    with a single slice and elements are returned as copies of its rows.
+    The order produced is the same as that for the equivalent list.
+    """
+    def __init__(self, iterable, buffer_size, seed=None):
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be a positive integer")
+        self._buffer_size = buffer_size
+        self._random = _UniformSource(seed)
+        self._exhausted = False
+        if NUMPY_AVAILABLE and isinstance(iterable, numpy.ndarray):
+            self._array = iterable
+            self._position = min(buffer_size, len(iterable))
+            self._buffer = iterable[:self._position].copy()
+            self._size = self._position
+        else:
+            self._array = None
+            self._iterable = iter_(iterable)
+            self._buffer = []
+            self._size = 0
+
+    def _fill(self):
+        while self._size < self._buffer_size:
+            try:
+                self._buffer.append(next(self._iterable))
+            except StopIteration:
+                self._exhausted = True
+                break
+            self._size += 1
+
+    def __next__(self):
+        if self._array is not None:
+            return self._next_from_array()
+        if not self._exhausted and self._size < self._buffer_size:
+            self._fill()
+        if self._size == 0:
+            raise StopIteration
+        i = self._random.randbelow(self._size)
+        value = self._buffer[i]
+        if not self._exhausted:
+            try:
+                self._buffer[i] = next(self._iterable)
+                return value
+            except StopIteration:
+                self._exhausted = True
+        self._size -= 1
+        self._buffer[i] = self._buffer[self._size]
+        self._buffer.pop()
+        return value
+
+    def _next_from_array(self):
+        if self._size == 0:
+            raise StopIteration
+        i = self._random.randbelow(self._size)
+        value = self._buffer[i].copy()
+        if self._position < len(self._array):
+            self._buffer[i] = self._array[self._position]
+            self._position += 1
+        else:
+            self._size -= 1
+            self._buffer[i] = self._buffer[self._size]
+        return value
+
+
+class mix(BaseItertool):
+    """mix(iterables, weights=None, seed=None, on_exhaust='drop',
+           block_size=1024) --> mix object
+
+    Return elements drawn from `iterables`, each one taken from an
+    iterable chosen at random with probability proportional to its weight
+    (all equal by default).
+
+    `on_exhaust` determines what happens once one of the iterables is
+    exhausted: with 'drop' it is no longer chosen, and iteration stops
+    when all are exhausted; with 'restart' it is iterated over again
+    (unless that yields nothing, in which case it is dropped); with
+    'stop', iteration stops.
+
+    The choices are computed `block_size` at a time from a block of
+    uniform draws. `seed` is as for `shuffle`, except that when NumPy is
+    available, None and integer seeds below 2 ** 32 seed a NumPy
+    `RandomState`, so that blocks are drawn in a single call. The random
+    state and the states of all the iterators are pickled, so that a
+    restored mix continues exactly as the original would have.
+    """
+    _ON_EXHAUST = ('drop', 'restart', 'stop')
+
+    def __init__(self, iterables, weights=None, seed=None,
+                 on_exhaust='drop', block_size=1024):
+        if on_exhaust not in self._ON_EXHAUST:
+            raise ValueError("on_exhaust must be one of {}".format(
+                ", ".join(self._ON_EXHAUST)))
+        sources = list(iterables)
+        if weights is None:
+            weights = [1.] * len(sources)
+        weights = [float(weight) for weight in weights]
+        if len(weights) != len(sources):
+            raise ValueError("expected {} weights, got {}".format(
+                len(sources), len(weights)))
+        if any(weight <= 0 for weight in weights):
+            raise ValueError("weights must be positive")
+        self._iters = [iter_(source) for source in sources]
+        self._sources = sources if on_exhaust == 'restart' else None
+        self._weights = weights
+        self._remaining = len(sources)
+        self._on_exhaust = on_exhaust
+        self._stopped = False
+        self._block_size = block_size
+        if NUMPY_AVAILABLE and (seed is None or
+                                isinstance(seed, six.integer_types) and
+                                0 <= seed < 2 ** 32):
+            seed = numpy.random.RandomState(seed)
+        self._random = _UniformSource(seed, block_size)
+        self._draws = ()
+        self._offset = 0
+        # The choices made by the current draws, given the weights; derived
+        # from them, so not pickled.
+        self._choices = None
+
+    def _compute_choices(self):
+        cumulative, total = [], 0.
+        for weight in self._weights:
+            total += weight
+            cumulative.append(total)
+        # Dividing by the last partial sum itself makes trailing entries
+        # exactly 1, so that dropped iterables at the end are never chosen.
+        cdf = [value / total for value in cumulative]
+        if isinstance(self._draws, list):
+            return [bisect.bisect_right(cdf, u) for u in self._draws]
+        return numpy.searchsorted(cdf, self._draws, side='right').tolist()
+
+    def _choose(self):
+        if self._offset == len(self._draws):
+            self._draws = self._random.take(self._block_size)
+            self._offset = 0
+            self._choices = None
+        if self._choices is None:
+            self._choices = self._compute_choices()
+        index = self._choices[self._offset]
+        self._offset += 1
+        return index
+
+    def __next__(self):
+        while not self._stopped and self._remaining > 0:
+            index = self._choose()
+            try:
+                return next(self._iters[index])
+            except StopIteration:
+                pass
+            if self._on_exhaust == 'stop':
+                self._stopped = True
+                break
+            if self._on_exhaust == 'restart':
+                self._iters[index] = iter_(self._sources[index])
+                try:
+                    return next(self._iters[index])
+                except StopIteration:
+                    pass
+            self._iters[index] = None
+            self._weights[index] = 0.
+            self._remaining -= 1
+            self._choices = None
+        raise StopIteration
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_choices'] = None
+        return state
+
+
+class reservoir_sample(BaseItertool):
+    """reservoir_sample(iterable, k, seed=None) --> reservoir_sample object
+
+    Return `k` elements sampled uniformly without replacement from
+    iterable, whose length need not be known (all of them, if there are
+    fewer than `k`). Nothing is returned until iterable is exhausted.
+
+    This is Algorithm L (Li, 1994): rather than drawing a random number for
+    every element, the number of elements to skip before the next one that
+    enters the reservoir is drawn from a geometric distribution, so that
+    O(k log(n/k)) numbers are drawn for n elements. The skipped elements
+    are not even read when iterable is backed by an indexable sequence
+    (lists, tuples, ranges, NumPy arrays, or iterators over these).
+
+    The reservoir, the random state and the input iterator are pickled.
+    To checkpoint while the input is being read, call :meth:`consume`
+    until it returns False, pickling in between. `seed` is as for
+    `shuffle`.
+    """
+    def __init__(self, iterable, k, seed=None):
+        if k < 0:
+            raise ValueError("k must be a non-negative integer")
+        sequence, position = as_sequence(iterable)
+        if sequence is None or isinstance(iterable, (ordered_sequence_iterator,
+                                                     range_iterator)):
+            self._iterable = iter_(iterable)
+        else:
+            self._iterable = ordered_sequence_iterator(sequence)
+            self._iterable._position = position
+        self._k = k
+        self._random = _UniformSource(seed)
+        self._reservoir = []
+        # The log of Algorithm L's W, and the number of elements left to
+        # skip before the next one replaces a random one in the reservoir
+        # (None until the reservoir is full).
+        self._log_w = 0.
+        self._skip = None
+        self._exhausted = k == 0
+        self._returned = 0
+
+    def _log_uniform(self):
+        u = self._random.random()
+        while u == 0.:
+            u = self._random.random()
+        return math.log(u)
+
+    def _draw_skip(self):
+        self._log_w += self._log_uniform() / self._k
+        # log(1 - W), accurately even when W is close to 0 or to 1.
+        self._skip = int(self._log_uniform() /
+                         math.log(-math.expm1(self._log_w)))
+
+    def consume(self, n=None):
+        """Read up to `n` more elements of the input (all, if `n` is None).
+
+        Returns False once the input is exhausted.
+        """
+        while not self._exhausted and (n is None or n > 0):
+            if len(self._reservoir) < self._k:
+                try:
+                    self._reservoir.append(next(self._iterable))
+                except StopIteration:
+                    self._exhausted = True
+                    break
+                if n is not None:
+                    n -= 1
+                continue
+            if self._skip is None:
+                self._draw_skip()
+            if self._skip > 0:
+                limit = self._skip if n is None else min(self._skip, n)
+                skipped = advance(self._iterable, limit)
+                self._skip -= skipped
+                if n is not None:
+                    n -= skipped
+                if skipped < limit:
+                    self._exhausted = True
+                continue
+            try:
+                value = next(self._iterable)
+            except StopIteration:
+                self._exhausted = True
+                break
+            self._reservoir[self._random.randbelow(self._k)] = value
+            self._draw_skip()
+            if n is not None:
+                n -= 1
+        return not self._exhausted
+
+    def sample(self):
+        """Return a list of the elements currently in the reservoir."""
+        return list(self._reservoir)
+
+    def __next__(self):
+        if not self._exhausted:
+            self.consume()
+        if self._returned >= len(self._reservoir):
+            raise StopIteration
+        self._returned += 1
+        return self._reservoir[self._returned - 1]
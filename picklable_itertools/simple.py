@@ -1,6 +1,10 @@
 import collections
-from .base import BaseItertool
-from .iter_dispatch import iter_
+from .base import BaseItertool, EXHAUSTED, has_next_or, next_or
+from .chunked import (
+    VectorizedMixin, MaskSelectionMixin, vectorized_new, check_scalar_kwargs,
+    pop_batch_size, as_chunkable, require_numpy
+)
+from .iter_dispatch import iter_, numpy
 
 
 class repeat(BaseItertool):
@@ -33,16 +37,36 @@ class chain(BaseItertool):
     first iterable until it is exhausted, then elements from the next
     iterable, until all of the iterables are exhausted.
     """
+    # For objects pickled before _next_or existed; always safe, if slower.
+    _current_native = False
+
     def __init__(self, *iterables):
         self._iterables = iter_(iterables)
         self._current = repeat(None, 0)
+        self._current_native = has_next_or(self._current)
+
+    def _next_or(self, default):
+        while True:
+            if self._current_native:
+                value = self._current._next_or(EXHAUSTED)
+            else:
+                value = next(self._current, EXHAUSTED)
+            if value is not EXHAUSTED:
+                return value
+            iterable = next_or(self._iterables, EXHAUSTED)
+            if iterable is EXHAUSTED:
+                return default
+            self._current = iter_(iterable)
+            self._current_native = has_next_or(self._current)
 
     def __next__(self):
-        try:
-            return next(self._current)
-        except StopIteration:
-            self._current = iter_(next(self._iterables))
-        return next(self)
+        while True:
+            try:
+                return next(self._current)
+            except StopIteration:
+                self._current = current = iter_(next(self._iterables))
+                self._current_native = getattr(current, '_native_next_or',
+                                               False)
 
     @classmethod
     def from_iterable(cls, iterable):
@@ -57,10 +81,43 @@ class compress(BaseItertool):
     Return data elements corresponding to true selector elements.
     Forms a shorter iterator from selected data elements using the
     selectors to choose the data elements.
+
+    With ``vectorized=True``, data and selectors must be sequences such as
+    NumPy arrays, and the selectors are used as a boolean mask a slice of
+    up to `batch_size` (default 1024) elements at a time, jumping directly
+    to the selected data.
     """
-    def __init__(self, data, selectors):
+    # For objects pickled before _next_or existed; always safe, if slower.
+    _natives = (False, False)
+
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(compress, cls, kwargs)
+
+    def __init__(self, data, selectors, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._data = iter_(data)
         self._selectors = iter_(selectors)
+        self._natives = (has_next_or(self._data),
+                         has_next_or(self._selectors))
+
+    def _next_or(self, default):
+        # We terminate on the shortest input sequence.
+        data_native, selectors_native = self._natives
+        while True:
+            if data_native:
+                data = self._data._next_or(EXHAUSTED)
+            else:
+                data = next(self._data, EXHAUSTED)
+            if data is EXHAUSTED:
+                return default
+            if selectors_native:
+                selector = self._selectors._next_or(EXHAUSTED)
+            else:
+                selector = next(self._selectors, EXHAUSTED)
+            if selector is EXHAUSTED:
+                return default
+            if selector:
+                return data
 
     def __next__(self):
         # We terminate on the shortest input sequence, so leave
@@ -73,6 +130,25 @@ class compress(BaseItertool):
         return data
 
 
+class _vectorized_compress(MaskSelectionMixin, compress):
+    """The ``vectorized=True`` variant of `compress`."""
+    def __init__(self, data, selectors, **kwargs):
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy('compress')
+        self._sequence = as_chunkable(data)
+        self._selectors = as_chunkable(selectors)
+        self._length = min(len(self._sequence), len(self._selectors))
+        self._position = 0
+        self._survivors = self._offset = self._chunk_stop = None
+
+    def _mask(self, start, stop):
+        return self._selectors[start:stop]
+
+
+compress._vectorized = _vectorized_compress
+
+
 class count(BaseItertool):
     """count(start=0, step=1) --> count object
 
@@ -119,8 +195,20 @@ class accumulate(BaseItertool):
     """accumulate(iterable[, func]) --> accumulate object
 
     Return series of accumulated sums (or other binary function results).
+
+    With ``vectorized=True``, func must be a binary NumPy ufunc (default
+    `numpy.add`) and its `accumulate` method is applied to slices of up to
+    `batch_size` (default 1024) elements, carrying the last result over
+    from one slice to the next; the iterable must be a sequence such as a
+    NumPy array and the values are the same as without it. With
+    ``batched=True``, the iterable may be any iterable of arrays instead,
+    and an array of accumulated values is returned for each of them.
     """
-    def __init__(self, iterable, func=None):
+    def __new__(cls, *args, **kwargs):
+        return vectorized_new(accumulate, cls, kwargs)
+
+    def __init__(self, iterable, func=None, **kwargs):
+        check_scalar_kwargs(kwargs)
         self._iter = iter_(iterable)
         self._func = func
         self._initialized = False
@@ -140,3 +228,62 @@ class accumulate(BaseItertool):
         else:
             self._accumulated = self._combine(value)
         return self._accumulated
+
+
+class _vectorized_accumulate(VectorizedMixin, accumulate):
+    """The ``vectorized=True`` variant of `accumulate`."""
+    _cached = ('_chunk', '_chunk_start')
+
+    def __init__(self, iterable, func=None, **kwargs):
+        self._batched = kwargs.pop('batched', False)
+        self._batch_size = pop_batch_size(kwargs)
+        check_scalar_kwargs(kwargs)
+        require_numpy('accumulate')
+        if func is None:
+            func = numpy.add
+        if not isinstance(func, numpy.ufunc) or func.nin != 2:
+            raise TypeError("vectorized accumulate requires a binary ufunc")
+        self._func = func
+        if self._batched:
+            self._iter = iter_(iterable)
+        else:
+            self._sequence = as_chunkable(iterable)
+            self._length = len(self._sequence)
+            self._position = 0
+        self._initialized = False
+        self._accumulated = None
+        self._chunk = self._chunk_start = None
+
+    def _accumulate(self, values):
+        values = numpy.asarray(values)
+        if not self._initialized:
+            return self._func.accumulate(values)
+        values = numpy.concatenate([[self._accumulated], values])
+        return self._func.accumulate(values)[1:]
+
+    def _next_batch(self):
+        results = self._accumulate(next(self._iter))
+        if len(results) > 0:
+            self._accumulated = results[-1]
+            self._initialized = True
+        return results
+
+    def __next__(self):
+        if self._batched:
+            return self._next_batch()
+        position = self._position
+        if position >= self._length:
+            raise StopIteration
+        chunk = self._chunk
+        if chunk is None or position >= self._chunk_start + len(chunk):
+            stop = min(position + self._batch_size, self._length)
+            chunk = self._chunk = self._accumulate(
+                self._sequence[position:stop])
+            self._chunk_start = position
+        self._position += 1
+        self._accumulated = chunk[position - self._chunk_start]
+        self._initialized = True
+        return self._accumulated
+
+
+accumulate._vectorized = _vectorized_accumulate
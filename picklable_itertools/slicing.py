@@ -1,7 +1,8 @@
+import copy
 import sys
 
-from .base import BaseItertool
-from .iter_dispatch import iter_
+from .base import BaseItertool, EXHAUSTED, has_next_or
+from .iter_dispatch import iter_, as_sequence, advance
 
 
 class islice(BaseItertool):
@@ -15,6 +16,9 @@ class islice(BaseItertool):
     skipped between successive calls.  Works like a slice() on a list
     but returns an iterator.
     """
+    # For objects pickled before _next_or existed; always safe, if slower.
+    _native = False
+
     def __init__(self, iterable, start, stop=None, step=1):
         if stop is None:
             start, stop = 0, start
@@ -25,18 +29,28 @@ class islice(BaseItertool):
                              "integer: 0 <= x <= maxint.")
 
         self._iterable = iter_(iterable)
-        i = 0
-        while i < start:
-            try:
-                next(self._iterable)
-                i += 1
-            except StopIteration:
-                break
+        self._native = has_next_or(self._iterable)
+        advance(self._iterable, start)
 
         self._stop = stop - start
         self._step = step
         self._n = 0
 
+    def _next_or(self, default):
+        iterable, native = self._iterable, self._native
+        while True:
+            if self._n == self._stop:
+                return default
+            if native:
+                value = iterable._next_or(EXHAUSTED)
+            else:
+                value = next(iterable, EXHAUSTED)
+            if value is EXHAUSTED:
+                return default
+            self._n += 1
+            if not (self._n - 1) % self._step:
+                return value
+
     def __next__(self):
         while self._n % self._step and self._n < self._stop:
             next(self._iterable)
@@ -46,3 +60,105 @@ class islice(BaseItertool):
         value = next(self._iterable)
         self._n += 1
         return value
+
+
+class shard(BaseItertool):
+    """shard(iterable, num_shards, index) --> shard object
+
+    Return every `num_shards`-th element of `iterable`, starting with the
+    one at position `index`; the same elements as
+    ``islice(iterable, index, None, num_shards)``. Intended for splitting
+    one stream between `num_shards` workers, each taking a different
+    `index`.
+
+    When `iterable` is backed by an indexable sequence (lists, tuples,
+    ranges, NumPy arrays, or iterators over these), elements are read
+    directly by position. Other iterables are stepped through, skipping
+    the elements that belong to other shards.
+
+    See Also:
+        reshard
+    """
+    def __init__(self, iterable, num_shards, index):
+        if not 0 <= index < num_shards:
+            raise ValueError("shard index must satisfy "
+                             "0 <= index < num_shards")
+        self._num_shards = num_shards
+        self._index = index
+        self._sequence, start = as_sequence(iterable)
+        if self._sequence is None:
+            self._iterable = iter_(iterable)
+            start = 0
+        else:
+            self._iterable = None
+        # Positions are counted from the start of the sequence or, for
+        # streams, from the first element `iterable` had left to yield.
+        # `_consumed` is the position of the next element of the stream.
+        self._position = start + index
+        self._consumed = start
+        self._stream_ended = False
+
+    def _exhausted(self):
+        if self._sequence is not None:
+            return self._position >= len(self._sequence)
+        return self._stream_ended
+
+    def __next__(self):
+        if self._sequence is not None:
+            if self._position >= len(self._sequence):
+                raise StopIteration
+            value = self._sequence[self._position]
+        else:
+            self._consumed += advance(self._iterable,
+                                      self._position - self._consumed)
+            try:
+                value = next(self._iterable)
+            except StopIteration:
+                self._stream_ended = True
+                raise
+            self._consumed += 1
+        self._position += self._num_shards
+        return value
+
+
+def reshard(shards, num_shards):
+    """Redistribute the remaining elements of a set of shards.
+
+    Given all the :class:`shard` objects splitting one iterable (typically
+    restored from the checkpoints of each worker), return a tuple of
+    `num_shards` new shards over the same iterable. They resume from the
+    earliest element that its old shard had not returned yet, so elements
+    that other workers had already read past that point are returned
+    again.
+
+    The old shards are not modified. New shards over a sequence share it
+    with the old ones; shards over a stream each get their own copy of the
+    stream, taken from the old shard that lags furthest behind.
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be a positive integer")
+    shards = list(shards)
+    old_num_shards = shards[0]._num_shards if shards else 0
+    if (sorted(s._index for s in shards) != list(range(old_num_shards)) or
+            any(s._num_shards != old_num_shards for s in shards)):
+        raise ValueError("reshard requires exactly one shard for each "
+                         "index of the original split")
+    source = min(shards, key=lambda s: s._consumed)
+    pending = [s._position for s in shards if not s._exhausted()]
+    if pending:
+        # No shard has read past its position, so neither has the source.
+        position = min(pending)
+    elif source._sequence is not None:
+        position = len(source._sequence)
+    else:
+        position = source._consumed
+    new_shards = []
+    for index in range(num_shards):
+        new_shard = copy.copy(source)
+        if source._iterable is not None:
+            new_shard._iterable = copy.deepcopy(source._iterable)
+        new_shard._num_shards = num_shards
+        new_shard._index = index
+        new_shard._position = position + index
+        new_shards.append(new_shard)
+    return tuple(new_shards)
@@ -0,0 +1,139 @@
+"""Picklable removal of duplicates from a stream."""
+import collections
+import hashlib
+import math
+import numbers
+import struct
+
+from six.moves import cPickle
+
+from .base import BaseItertool
+from .iter_dispatch import iter_
+
+
+def _canonical(item):
+    """Return `item` with numbers, including those in tuples, converted to
+    the first of int, float and complex that they are equal to."""
+    if isinstance(item, tuple):
+        return tuple(_canonical(element) for element in item)
+    if isinstance(item, numbers.Number):
+        for convert in (int, float, complex):
+            try:
+                converted = convert(item)
+            except (TypeError, ValueError, OverflowError):
+                continue
+            if converted == item:
+                return converted
+    return item
+
+
+class _bloom_filter(object):
+    """A Bloom filter holding `capacity` items with the given error rate.
+
+    Items are hashed from their pickle, so that the filter gives the same
+    answers in every process (unlike `hash`, which is salted for strings)
+    as long as the items pickle identically. Numbers are made canonical
+    first, so that equal ones such as 1, 1.0 and True are the same item,
+    as they are in a set. The bits are a `bytearray`, pickled as raw
+    bytes.
+    """
+    def __init__(self, capacity, error_rate):
+        if capacity < 1:
+            raise ValueError("capacity must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) /
+                                 math.log(2) ** 2))
+        self._num_bits = max(num_bits, 8)
+        self._num_hashes = max(
+            1, int(round(self._num_bits / float(capacity) * math.log(2))))
+        self._bits = bytearray((self._num_bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.sha1(cPickle.dumps(_canonical(item), 2)).digest()
+        # Double hashing: the i-th position is h1 + i * h2.
+        first, second = struct.unpack('<QQ', digest[:16])
+        return [(first + i * second) % self._num_bits
+                for i in range(self._num_hashes)]
+
+    def add(self, item):
+        """Add `item`, returning whether it was (probably) already in."""
+        present = True
+        for position in self._positions(item):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & bit:
+                present = False
+                self._bits[byte] |= bit
+        return present
+
+
+class unique(BaseItertool):
+    """unique(iterable, key=None, mode='exact', capacity=None,
+              error_rate=0.01) --> unique object
+
+    Return the elements of iterable whose key (by default, the element
+    itself) was not seen before, in order. `mode` determines how seen keys
+    are remembered:
+
+    * 'exact' keeps them all in a set.
+    * 'lru' keeps only the `capacity` most recently seen, so a duplicate
+      is only dropped if its key was seen among the last `capacity`
+      distinct keys.
+    * 'bloom' keeps a Bloom filter sized for `capacity` distinct keys, so
+      that memory is fixed. A new key is mistaken for a duplicate (and
+      dropped) with probability `error_rate`, rising above it once more
+      than `capacity` distinct keys are seen. Keys are hashed from their
+      pickle, so they should pickle deterministically: other than numbers
+      (compared by value, as in the other modes), equal keys that pickle
+      differently count as distinct.
+
+    The set, the keys in recency order or the filter's bit array is
+    pickled along with iterable.
+    """
+    _MODES = ('exact', 'lru', 'bloom')
+
+    def __init__(self, iterable, key=None, mode='exact', capacity=None,
+                 error_rate=0.01):
+        if mode not in self._MODES:
+            raise ValueError("mode must be one of {}".format(
+                ", ".join(self._MODES)))
+        if mode != 'exact' and capacity is None:
+            raise ValueError("{} mode requires a capacity".format(mode))
+        self._iterable = iter_(iterable)
+        self._key = key
+        self._mode = mode
+        self._capacity = capacity
+        if mode == 'exact':
+            self._seen = set()
+        elif mode == 'lru':
+            if capacity < 1:
+                raise ValueError("capacity must be a positive integer")
+            self._seen = collections.OrderedDict()
+        else:
+            self._seen = _bloom_filter(capacity, error_rate)
+
+    def _is_new(self, key):
+        seen = self._seen
+        if self._mode == 'exact':
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
+        if self._mode == 'lru':
+            if key in seen:
+                # Move it to the most recent end.
+                del seen[key]
+                seen[key] = None
+                return False
+            seen[key] = None
+            if len(seen) > self._capacity:
+                seen.popitem(last=False)
+            return True
+        return not seen.add(key)
+
+    def __next__(self):
+        while True:
+            value = next(self._iterable)
+            key = value if self._key is None else self._key(value)
+            if self._is_new(key):
+                return value
@@ -5,7 +5,7 @@ import random
 import tempfile
 
 import six
-from six.moves import cPickle
+from six.moves import cPickle, copyreg
 from six.moves import xrange
 from nose.tools import assert_raises, assert_equal
 from unittest import SkipTest
@@ -15,7 +15,7 @@ from picklable_itertools import (
     file_iterator, ordered_sequence_iterator, izip_longest, iter_, islice,
     range_iterator, product, tee, accumulate, takewhile, dropwhile, starmap,
     groupby, permutations, combinations, combinations_with_replacement,
-    xrange as _xrange
+    xrange as _xrange, permuted_xrange
 )
 from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
 
@@ -82,6 +82,26 @@ def verify_pickle(picklable_version, reference_version, n, m, *args, **kwargs):
         done += 1
 
 
+class OldState(object):
+    """Pickles as a `cls` object whose attributes are `state`, the way an
+    earlier version of `cls` with different attributes was pickled.
+
+    `state` may refer to other `OldState` objects.
+    """
+    def __init__(self, cls, state):
+        self._cls = cls
+        self._state = state
+
+    def __reduce__(self):
+        return copyreg._reconstructor, (self._cls, object, None), self._state
+
+
+def old_pickle(cls, state):
+    """Pickle a `cls` object whose attributes are `state`, as written by
+    an earlier version of `cls`."""
+    return cPickle.dumps(OldState(cls, state))
+
+
 def conditional_run(condition, f, *args, **kwargs):
     if condition:
         f(*args, **kwargs)
@@ -429,6 +449,38 @@ def test_accumulate():
            [9, 1, 2], sub)
 
 
+def verify_vectorized_accumulate():
+    vectorized = partial(accumulate, vectorized=True, batch_size=3)
+    values = numpy.arange(1, 11)
+    verify_same(vectorized, itertools.accumulate, None, values)
+    verify_same(vectorized, itertools.accumulate, None, values[:0])
+    verify_same(vectorized, itertools.accumulate, None, values,
+                numpy.subtract)
+    for m in range(9):
+        verify_pickle(vectorized, itertools.accumulate, 10, m, values,
+                      numpy.maximum)
+    it = vectorized(values)
+    next(it)
+    assert cPickle.loads(cPickle.dumps(it)).__dict__['_chunk'] is None
+    batches = [values[:4], values[4:4], values[4:]]
+    batched = partial(accumulate, vectorized=True, batched=True)
+    expected = list(batched(batches, numpy.multiply))
+    assert (numpy.concatenate(expected) ==
+            numpy.multiply.accumulate(values)).all()
+    verify_pickle(batched, lambda *args: iter(expected), len(expected), 0,
+                  batches, numpy.multiply)
+    assert_raises(TypeError, accumulate, values, max, vectorized=True)
+    assert_raises(TypeError, accumulate, values, numpy.negative,
+                  vectorized=True)
+    assert_raises(TypeError, accumulate, iter(values), vectorized=True)
+
+
+def test_vectorized_accumulate():
+    if not six.PY3:
+        raise SkipTest()
+    yield conditional_run, NUMPY_AVAILABLE, verify_vectorized_accumulate
+
+
 def test_takewhile():
     base = (verify_same, takewhile, itertools.takewhile, None)
     yield base + (bool,)
@@ -467,6 +519,78 @@ def test_starmap():
            [(5, 9), [4, 2]])
 
 
+def verify_vectorized_imap():
+    vectorized = partial(imap, vectorized=True, batch_size=3)
+    first, second = numpy.arange(8), numpy.arange(10, 17)
+    verify_same(vectorized, _map, None, numpy.add, first, second)
+    verify_same(vectorized, _map, None, numpy.negative, first[:0])
+    for m in range(6):
+        verify_pickle(vectorized, _map, 7, m, numpy.add, first, second)
+    it = vectorized(numpy.add, first, second)
+    next(it)
+    assert cPickle.loads(cPickle.dumps(it)).__dict__['_chunk'] is None
+    batches = list(vectorized(numpy.negative, first, batched=True))
+    assert [len(batch) for batch in batches] == [3, 3, 2]
+    assert (numpy.concatenate(batches) == -first).all()
+    rows = numpy.arange(10).reshape(5, 2)
+    verify_pickle(partial(starmap, vectorized=True, batch_size=2),
+                  itertools.starmap, 5, 2, numpy.multiply, rows)
+    assert_raises(TypeError, starmap, numpy.add, first, vectorized=True)
+    assert_raises(TypeError, imap, numpy.add, iter(first), vectorized=True)
+    assert_raises(ValueError, list, vectorized(numpy.sum, first))
+    assert_raises(ValueError, imap, abs, first, batch_size=3)
+    assert list(imap(abs, [-1, 2], vectorized=False)) == [1, 2]
+
+
+def test_vectorized_imap():
+    yield conditional_run, NUMPY_AVAILABLE, verify_vectorized_imap
+
+
+def _multiple_of_three(x):
+    return x % 3 == 0
+
+
+def _below_nine(x):
+    return x < 9
+
+
+def _nonnegative(x):
+    return x >= 0
+
+
+def verify_vectorized_selection():
+    data = numpy.arange(20)
+    selectors = data % 3 == 0
+    vectorized = partial(compress, vectorized=True, batch_size=4)
+    verify_same(vectorized, itertools.compress, None, data, selectors)
+    verify_same(vectorized, itertools.compress, None, data, selectors[:7])
+    for m in range(6):
+        verify_pickle(vectorized, itertools.compress, 7, m, data, selectors)
+    it = vectorized(data, selectors)
+    next(it)
+    assert cPickle.loads(cPickle.dumps(it)).__dict__['_survivors'] is None
+    for picklable, reference in [(ifilter, _filter),
+                                 (ifilterfalse, _filterfalse),
+                                 (takewhile, itertools.takewhile),
+                                 (dropwhile, itertools.dropwhile)]:
+        vectorized = partial(picklable, vectorized=True, batch_size=4)
+        for predicate in (_multiple_of_three, _below_nine, _nonnegative):
+            verify_same(vectorized, reference, None, predicate, data)
+            if len(list(reference(predicate, data))) > 4:
+                verify_pickle(vectorized, reference, 4, 2, predicate, data)
+        verify_same(vectorized, reference, None, _below_nine, data[:0])
+        assert_raises(TypeError, picklable, _nonnegative, iter(data),
+                      vectorized=True)
+    verify_same(partial(ifilter, vectorized=True), _filter, None, None,
+                data % 3)
+    assert_raises(ValueError, list,
+                  ifilter(numpy.sum, data, vectorized=True))
+
+
+def test_vectorized_selection():
+    yield conditional_run, NUMPY_AVAILABLE, verify_vectorized_selection
+
+
 def verify_groupby(*args, **kwargs):
     if 'n' in kwargs:
         if 'm' not in kwargs:
@@ -538,6 +662,87 @@ def test_groupby():
            partial(_mod, divisor=2))
 
 
+def test_groupby_key_calls():
+    calls = []
+
+    def key(x):
+        calls.append(x)
+        return x // 2
+
+    values = [1, 2, 3, 4, 5, 6, 7]
+    grouped = groupby(values, key)
+    _, first = next(grouped)
+    _, second = next(grouped)
+    assert list(first) == []
+    assert next(second) == 2
+    assert list(second) == [3]
+    assert [k for k, _ in grouped] == [2, 3]
+    assert calls == values
+    verify_pickle(lambda: next(groupby([4, 8, 12, 1],
+                                       partial(_mod, divisor=4)))[1],
+                  lambda: iter([4, 8, 12]), 3, 0)
+
+
+def verify_groupby_old_pickle(position, grouper_state, grouper_rest):
+    from picklable_itertools.grouping import _grouper
+    values = [1, 1, 2, 2, 3]
+    rest = [(2, [2, 2]), (3, [3])] if grouper_state['_key'] == 1 else []
+    iterator = iter_(values)
+    for _ in range(position):
+        next(iterator)
+    # The state of a groupby and its current grouper before the redesign.
+    groupby_state = {'_keyfunc': None, '_iterator': iterator,
+                     '_current_key': None, '_initial_key': None}
+    old_groupby = OldState(groupby, groupby_state)
+    old_grouper = OldState(_grouper, dict(grouper_state, _iterator=iterator,
+                                          _groupby=old_groupby))
+    groupby_state['_current_grouper'] = old_grouper
+    # Either may be unpickled first.
+    grouped, group = cPickle.loads(cPickle.dumps((old_groupby, old_grouper)))
+    assert list(group) == grouper_rest
+    assert [(k, list(g)) for k, g in grouped] == rest
+    group, grouped = cPickle.loads(cPickle.dumps((old_grouper, old_groupby)))
+    assert list(group) == grouper_rest
+    assert [(k, list(g)) for k, g in grouped] == rest
+
+
+def test_groupby_old_pickle():
+    state = {'_value': 1, '_key': 1, '_initialized': False, '_done': False,
+             'stream_ended': False}
+    yield verify_groupby_old_pickle, 1, state, [1, 1]
+    state = dict(state, _initialized=True)
+    yield verify_groupby_old_pickle, 2, state, []
+    state = dict(state, _done=True, terminal_value=2)
+    yield verify_groupby_old_pickle, 3, state, []
+    state = {'_value': 3, '_key': 3, '_initialized': True, '_done': True,
+             'stream_ended': True}
+    yield verify_groupby_old_pickle, 5, state, []
+
+
+def verify_vectorized_groupby():
+    values = numpy.array([1, 1, 2, 3, 3, 3, 3, 3, 4, 5, 5, 5, 5, 5, 7])
+    expected = [(k, list(g)) for k, g in itertools.groupby(values)]
+    for batch_size in (1, 2, 3, 1024):
+        grouped = groupby(values, vectorized=True, batch_size=batch_size)
+        actual = [(k, list(g)) for k, g in grouped]
+        assert actual == expected
+    grouped = groupby(values, partial(_mod, divisor=2), vectorized=True,
+                      batch_size=4)
+    key, group = next(grouped)
+    assert key == 1 and numpy.shares_memory(group, values)
+    grouped = cPickle.loads(cPickle.dumps(grouped))
+    assert grouped.__dict__['_keys'] is None
+    assert [(k, g.tolist()) for k, g in grouped] == [
+        (0, [2]), (1, [3, 3, 3, 3, 3]), (0, [4]), (1, [5, 5, 5, 5, 5, 7])]
+    rows = numpy.array([[0, 1], [0, 1], [1, 1]])
+    assert [len(g) for _, g in groupby(rows, vectorized=True)] == [2, 1]
+    assert list(groupby(values[:0], vectorized=True)) == []
+
+
+def test_vectorized_groupby():
+    yield conditional_run, NUMPY_AVAILABLE, verify_vectorized_groupby
+
+
 def test_permutations():
     yield verify_same, permutations, itertools.permutations, None, _identity,
     yield (verify_same, permutations, itertools.permutations, None,
@@ -611,3 +816,145 @@ def test_xrange():
     yield assert_equal, _xrange(10, 3, -1).count(5), 1
     yield assert_equal, _xrange(10, 0, -2).count(6), 1
     yield assert_equal, _xrange(10, -1, -3).count(7), 1
+    yield assert_equal, _xrange(3, 20, 4)[2], 11
+    yield assert_equal, _xrange(3, 20, 4)[-1], 19
+    yield assert_raises, IndexError, _xrange(3, 20, 4).__getitem__, 5
+    yield (assert_equal, list(_xrange(3, 20, 4)[1:4]),
+           list(xrange(3, 20, 4)[1:4]))
+    yield (assert_equal, list(_xrange(10, -1, -3)[::-2]),
+           list(xrange(10, -1, -3)[::-2]))
+
+
+def verify_permuted_xrange(n, seed):
+    permuted = permuted_xrange(n, seed)
+    values = list(permuted)
+    assert sorted(values) == list(range(len(values)))
+    assert values == [permuted[i] for i in range(len(values))]
+    assert all(permuted.index(v) == i for i, v in enumerate(values))
+
+
+def test_permuted_xrange():
+    for n in [0, 1, 2, 3, 10, 64, 65, 1000]:
+        yield verify_permuted_xrange, n, 5
+    assert list(permuted_xrange(100, 3)) == list(permuted_xrange(100, 3))
+    assert list(permuted_xrange(100, 3)) != list(permuted_xrange(100, 4))
+    assert list(permuted_xrange(100, 3)) != list(range(100))
+    big = permuted_xrange(10 ** 12, 1)
+    assert 0 <= big[-1] < 10 ** 12
+    assert big.index(big[123456789]) == 123456789
+    assert_raises(IndexError, big.__getitem__, 10 ** 12)
+    assert_raises(ValueError, big.index, -1)
+    shuffled = _xrange(5, 50, 5).shuffled(2)
+    assert sorted(shuffled) == list(range(5, 50, 5))
+    unseeded = permuted_xrange(50)
+    assert list(cPickle.loads(cPickle.dumps(unseeded))) == list(unseeded)
+    verify_pickle(iter, lambda permuted: iter(list(permuted)), 100, 11,
+                  permuted_xrange(100, 9))
+
+
+def test_permuted_xrange_slicing():
+    permuted = permuted_xrange(_xrange(3, 60, 3), 7)
+    values = list(permuted)
+    for index in [slice(4, 12), slice(None, None, -3), slice(15, 2, -2),
+                  slice(30, 40)]:
+        view = permuted[index]
+        assert isinstance(view, permuted_xrange)
+        assert list(view) == values[index]
+        assert [view.index(v) for v in view] == list(range(len(view)))
+        assert list(cPickle.loads(cPickle.dumps(view))) == values[index]
+    view = permuted[4:12][1::2]
+    assert list(view) == values[4:12][1::2]
+    assert view.count(values[5]) == 1 and view.count(values[6]) == 0
+    assert_raises(ValueError, view.index, values[0])
+    assert repr(permuted[2:5]).endswith('[2:5:1]')
+
+
+class _negated(imap):
+    def __next__(self):
+        return -super(_negated, self).__next__()
+
+
+def test_next_or():
+    from picklable_itertools.base import next_or
+    it = chain([1], [], iter([2]), _xrange(3, 4))
+    assert [next_or(it, None) for _ in range(4)] == [1, 2, 3, None]
+    assert_raises(StopIteration, next, it)
+    assert next_or(iter([]), 'end') == 'end'
+    # Overriding __next__ alone also changes _next_or.
+    negated = _negated(abs, [1, -2])
+    assert next_or(negated, None) == -1
+    assert next(negated) == -2
+    assert next_or(negated, None) is None
+    many_empty = chain.from_iterable([[]] * 10000 + [[1]])
+    assert list(many_empty) == [1]
+    assert list(compress(_xrange(6), iter_([1, 0, 1]))) == [0, 2]
+
+
+def verify_alternating_next_or(picklable, reference, seed):
+    # __next__ and _next_or are written separately on the hot classes, so
+    # mix them in one pass and compare with the reference.
+    end = object()
+    rng = random.Random(seed)
+    it = picklable()
+    expected = list(reference()) + [end, end]
+    actual = []
+    for _ in expected:
+        if rng.random() < 0.5:
+            actual.append(it._next_or(end))
+        else:
+            actual.append(next(it, end))
+    assert actual == expected
+
+
+def test_alternating_next_or():
+    for seed in range(4):
+        yield (verify_alternating_next_or, partial(range_iterator,
+                                                   _xrange(2, 17, 3)),
+               partial(xrange, 2, 17, 3), seed)
+        yield (verify_alternating_next_or,
+               partial(ordered_sequence_iterator, [5, 4, 3, 2, 1]),
+               partial(iter, [5, 4, 3, 2, 1]), seed)
+        yield (verify_alternating_next_or,
+               partial(chain, [1, 2], [], iter([3, 4]), _xrange(5, 8)),
+               partial(itertools.chain, [1, 2], [], [3, 4], xrange(5, 8)),
+               seed)
+        yield (verify_alternating_next_or,
+               partial(compress, _xrange(10), iter([1, 0, 0, 1, 1, 0, 1])),
+               partial(itertools.compress, xrange(10),
+                       [1, 0, 0, 1, 1, 0, 1]), seed)
+        yield (verify_alternating_next_or,
+               partial(izip_longest, [1, 2, 3], iter([4]), _xrange(2),
+                       fillvalue=0),
+               partial(_zip_longest, [1, 2, 3], [4], xrange(2),
+                       fillvalue=0), seed)
+        for args in [(7,), (2, 9), (0, 10, 3), (1, 11, 4), (3, 5, 5),
+                     (4, 100, 2)]:
+            yield (verify_alternating_next_or,
+                   partial(islice, _xrange(12), *args),
+                   partial(_islice, xrange(12), *args), seed)
+            yield (verify_alternating_next_or,
+                   partial(islice, iter(list(range(12))), *args),
+                   partial(_islice, xrange(12), *args), seed)
+
+
+def verify_next_or_old_pickle(cls, args, added):
+    from picklable_itertools.base import next_or
+    expected = list(cls(*args))
+    it = cls(*args)
+    first = next(it)
+    # Objects pickled before _next_or was added lack the flags it uses.
+    state = dict((name, value) for name, value in it.__dict__.items()
+                 if name not in added)
+    it = cPickle.loads(old_pickle(cls, state))
+    assert [first, next_or(it, None)] + list(it) == expected
+
+
+def test_next_or_old_pickle():
+    yield (verify_next_or_old_pickle, chain, ([1, 2], [3]),
+           ['_current_native'])
+    yield (verify_next_or_old_pickle, compress, ([1, 2, 3, 4], [1, 0, 1, 1]),
+           ['_natives'])
+    yield verify_next_or_old_pickle, islice, ([1, 2, 3, 4, 5], 0, 5, 2), \
+        ['_native']
+    yield (verify_next_or_old_pickle, izip_longest, ([1, 2, 3], [4]),
+           ['_natives'])
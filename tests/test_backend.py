@@ -0,0 +1,107 @@
+from functools import partial
+from operator import add
+
+from unittest import SkipTest
+
+from nose.tools import assert_raises
+
+import picklable_itertools
+from picklable_itertools import get_backend, use_backend
+from picklable_itertools.backend import native_implementations
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
+from picklable_itertools.map_zip import imap
+
+from . import verify_pickle
+
+
+def _checkpoint_cases():
+    """(name, args, steps before the checkpoint) for each exported name."""
+    return [
+        ('ifilter', (None, [0, 3, 0, 4, 5]), 1),
+        ('ifilterfalse', (bool, [0, 3, 0, 0, 5]), 1),
+        ('takewhile', (bool, [1, 2, 3, 0, 4]), 2),
+        ('dropwhile', (bool, [1, 2, 0, 3, 4]), 1),
+        ('imap', (add, [1, 2, 3, 4], [5, 6, 7, 8]), 2),
+        ('imap', (None, [1, 2, 3], [4, 5, 6]), 1),
+        ('starmap', (add, [(1, 2), (3, 4), (5, 6)]), 1),
+        ('izip', ([1, 2, 3], 'abc'), 1),
+        ('izip_longest', ([1, 2, 3], 'a'), 1),
+        ('permutations', ([1, 2, 3], 2), 3),
+        ('combinations', ([1, 2, 3, 4], 2), 2),
+        ('combinations_with_replacement', ([1, 2, 3], 2), 4),
+        ('product', ([1, 2], 'abc'), 4),
+        ('accumulate', ([1, 2, 3, 4],), 2),
+        ('chain', ([1, 2], [], [3, 4]), 1),
+        ('compress', ('abcdef', [1, 0, 1, 1, 0, 1]), 2),
+        ('repeat', ('x', 4), 2),
+        ('islice', (list(range(20)), 2, 15, 3), 2),
+        ('filter', (None, [1, 0, 2, 0, 3]), 2),
+        ('zip', ([1, 2, 3], [4, 5, 6]), 2),
+    ]
+
+
+def test_checkpoints_round_trip():
+    for name, args, steps in _checkpoint_cases():
+        expected = list(getattr(picklable_itertools, name)(*args))
+        for backend in ['python', 'native']:
+            try:
+                use_backend(backend)
+                verify_pickle(getattr(picklable_itertools, name),
+                              lambda *args: iter(expected), len(expected),
+                              steps - 1, *args)
+            finally:
+                use_backend('python')
+
+
+def test_infinite_iterators():
+    try:
+        for backend in ['python', 'native']:
+            use_backend(backend)
+            for make in [partial(picklable_itertools.count, 3, 2),
+                         partial(picklable_itertools.cycle, [1, 2, 3])]:
+                verify_pickle(make, make, 8, 0)
+    finally:
+        use_backend('python')
+
+
+def test_use_backend():
+    assert get_backend() == 'python'
+    try:
+        use_backend('native')
+        assert get_backend() == 'native'
+        for name, native in native_implementations().items():
+            implementation = getattr(picklable_itertools, name)
+            assert (implementation is native or
+                    implementation.__wrapped__ is native)
+        assert picklable_itertools.zip is picklable_itertools.izip
+    finally:
+        use_backend('python')
+    assert get_backend() == 'python'
+    assert picklable_itertools.imap is imap
+    assert picklable_itertools.zip is picklable_itertools.izip
+    assert_raises(ValueError, use_backend, 'fortran')
+
+
+def test_vectorized_keywords():
+    try:
+        use_backend('native')
+        compress = picklable_itertools.compress
+        assert list(compress('abc', [1, 0, 1], vectorized=False)) == ['a', 'c']
+        assert_raises(ValueError, compress, 'abc', [1, 0, 1], batch_size=2)
+        if not NUMPY_AVAILABLE:
+            raise SkipTest
+        values = numpy.array([3, 3, 1, 2, 2])
+        for name, args in [('imap', (abs, values)),
+                           ('compress', (values, values > 1)),
+                           ('accumulate', (values,)),
+                           ('ifilter', (None, values - 1))]:
+            implementation = getattr(picklable_itertools, name)
+            it = implementation(*args, vectorized=True, batch_size=2)
+            use_backend('python')
+            assert list(it) == list(getattr(picklable_itertools, name)(*args))
+            use_backend('native')
+        grouped = picklable_itertools.groupby(values, vectorized=True)
+        assert [(k, list(g)) for k, g in grouped] == [(3, [3, 3]), (1, [1]),
+                                                      (2, [2, 2])]
+    finally:
+        use_backend('python')
@@ -0,0 +1,104 @@
+from unittest import SkipTest
+
+from nose.tools import assert_raises
+from six.moves import cPickle
+
+from picklable_itertools import iter_
+from picklable_itertools.extras import collate, bucket_by
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise SkipTest
+
+
+def test_collate():
+    _require_numpy()
+    examples = [numpy.full((2, 3), i) for i in range(7)]
+    batches = list(collate(examples, 3))
+    assert [batch.shape for batch in batches] == [(3, 2, 3), (3, 2, 3),
+                                                  (1, 2, 3)]
+    assert (numpy.concatenate(batches) == numpy.stack(examples)).all()
+    batches = list(collate([[1, 2], [3, 4]], 4, dtype='float32'))
+    assert batches[0].dtype == numpy.float32
+    assert batches[0].tolist() == [[1, 2], [3, 4]]
+    assert_raises(ValueError, list, collate([[1, 2], [3]], 2))
+    assert_raises(ValueError, collate, examples, 0)
+
+
+def test_collate_buffers():
+    _require_numpy()
+    examples = [numpy.full(3, i) for i in range(7)]
+    it = collate(examples, 2, num_buffers=2)
+    first, second, third = next(it), next(it), next(it)
+    assert third is first
+    assert not numpy.shares_memory(first, second)
+    assert third.tolist() == [[4] * 3, [5] * 3]
+    fresh = collate(examples, 2)
+    assert not numpy.shares_memory(next(fresh), next(fresh))
+
+
+def test_collate_ragged():
+    _require_numpy()
+    examples = [numpy.arange(n) for n in (1, 3, 2)]
+    it = collate(examples, 2, shape=(3,), ragged=True, pad_value=-1)
+    batch, mask = next(it)
+    assert batch.tolist() == [[0, -1, -1], [0, 1, 2]]
+    assert mask.tolist() == [[True, False, False], [True, True, True]]
+    batch, mask = next(it)
+    assert batch.tolist() == [[0, 1, -1]]
+    assert mask.tolist() == [[True, True, False]]
+    assert_raises(ValueError, collate, examples, 2, ragged=True)
+    assert_raises(ValueError, list,
+                  collate(examples, 2, shape=(2,), ragged=True))
+
+
+def test_collate_pickle():
+    _require_numpy()
+    examples = [numpy.full(3, i) for i in range(6)]
+    examples[2] = numpy.zeros(2)
+    it = collate(examples, 1000, num_buffers=2)
+    assert_raises(ValueError, next, it)
+    state = cPickle.dumps(it)
+    assert len(state) < 3000
+    restored = cPickle.loads(state)
+    for batch in (next(it), next(restored)):
+        assert batch.tolist() == [[0] * 3, [1] * 3, [3] * 3, [4] * 3,
+                                  [5] * 3]
+
+
+def test_bucket_by():
+    words = ['a', 'bb', 'ccc', 'd', 'eeee', 'ff', 'g', 'hhhhh', 'ii', 'j']
+    batches = list(bucket_by(words, len, [2, 4], 2))
+    assert batches == [('bb', 'ccc'), ('a', 'd'), ('eeee', 'hhhhh'),
+                       ('ff', 'ii'), ('g', 'j')]
+    batches = list(bucket_by(words, len, [2], [3, 2]))
+    assert batches == [('bb', 'ccc'), ('eeee', 'ff'), ('a', 'd', 'g'),
+                       ('hhhhh', 'ii'), ('j',)]
+    assert sorted(sum(batches, ())) == sorted(words)
+    assert list(bucket_by([], len, [2], 2)) == []
+    assert_raises(ValueError, bucket_by, words, len, [4, 2], 2)
+    assert_raises(ValueError, bucket_by, words, len, [2], [1, 2, 3])
+    assert_raises(ValueError, bucket_by, words, len, [2], 2, flush='random')
+
+
+def test_bucket_by_max_buffered():
+    words = ['a', 'bb', 'cc', 'dd']
+    largest = bucket_by(words, len, [2], 10, max_buffered=3)
+    assert list(largest) == [('bb', 'cc', 'dd'), ('a',)]
+    oldest = bucket_by(words, len, [2], 10, max_buffered=3, flush='oldest')
+    assert list(oldest) == [('a',), ('bb', 'cc', 'dd')]
+    it = bucket_by(range(100), lambda x: x, [], 1000, max_buffered=7)
+    assert all(len(batch) == 8 for batch in list(it)[:-1])
+
+
+def test_bucket_by_pickle():
+    words = ['a', 'bb', 'ccc', 'd', 'eeee', 'ff', 'g', 'hhhhh', 'ii', 'j']
+    it = bucket_by(iter_(words), len, [2, 4], 2)
+    expected = list(bucket_by(words, len, [2, 4], 2))
+    first = next(it)
+    state = cPickle.dumps(it)
+    assert sum(map(len, it._buckets)) == 1
+    restored = cPickle.loads(state)
+    assert [first] + list(restored) == expected
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from unittest import SkipTest
+
+from nose.tools import assert_raises
+from six.moves import cPickle
+
+from picklable_itertools import iter_, imap
+from picklable_itertools.extras import cache
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
+
+
+class _Counter(object):
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1
+        return x * x
+
+
+def _in_tempdir(test):
+    def wrapped():
+        directory = tempfile.mkdtemp()
+        try:
+            test(os.path.join(directory, 'cache'))
+        finally:
+            shutil.rmtree(directory)
+    wrapped.__name__ = test.__name__
+    return wrapped
+
+
+@_in_tempdir
+def test_cache(path):
+    square = _Counter()
+    expected = [x * x for x in range(10)]
+    assert list(cache(imap(square, range(10)), path)) == expected
+    assert square.calls == 10
+    assert list(cache(imap(square, range(10)), path)) == expected
+    assert list(cache(None, path)) == expected
+    assert square.calls == 10
+    assert_raises(ValueError, cache, [], path, serializer='json')
+
+
+@_in_tempdir
+def test_cache_empty(path):
+    assert list(cache([], path)) == []
+    assert list(cache(None, path)) == []
+    assert_raises(ValueError, list, cache(None, path + '2'))
+
+
+@_in_tempdir
+def test_cache_pickle(path):
+    data = [{'x': i} for i in range(20)]
+    it = cache(iter_(data), path)
+    head = [next(it) for _ in range(7)]
+    state = cPickle.dumps(it)
+    for _ in range(5):
+        next(it)
+    del it
+    # The restored cache replays what was written after it was pickled.
+    restored = cPickle.loads(state)
+    assert head + list(restored) == data
+    replay = cache(None, path)
+    head = [next(replay) for _ in range(3)]
+    state = cPickle.dumps(replay)
+    assert len(state) < 300
+    assert head + list(cPickle.loads(state)) == data
+
+
+@_in_tempdir
+def test_cache_partial(path):
+    square = _Counter()
+    it = cache(imap(square, range(10)), path)
+    for _ in range(4):
+        next(it)
+    del it
+    # A torn record past the last indexed one is discarded.
+    with open(path, 'ab') as data_file:
+        data_file.write(b'garbage')
+    with open(path + '.index', 'ab') as index_file:
+        index_file.write(b'\1\2\3')
+    # The new iterable is advanced past the 4 cached elements.
+    resumed = cache(range(10), path)
+    assert list(resumed) == [0, 1, 4, 9, 4, 5, 6, 7, 8, 9]
+    assert list(cache(None, path)) == [0, 1, 4, 9, 4, 5, 6, 7, 8, 9]
+
+
+@_in_tempdir
+def test_cache_numpy(path):
+    if not NUMPY_AVAILABLE:
+        raise SkipTest
+    arrays = [numpy.arange(n, dtype='float32').reshape(n, 1)
+              for n in range(5)]
+    arrays.append(numpy.ones((2, 3), dtype='int16')[:, ::2])
+    written = list(cache(arrays, path, 'numpy'))
+    replayed = list(cache(None, path, 'numpy'))
+    for array, result in zip(arrays, written + replayed):
+        assert result.shape == array.shape and result.dtype == array.dtype
+        assert (result == array).all()
+    for result in replayed:
+        assert not result.flags.writeable
+        assert result.ctypes.data % 16 == 0
+    assert_raises(ValueError, list,
+                  cache([numpy.array([None])], path + '2', 'numpy'))
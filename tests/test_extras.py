@@ -1,11 +1,23 @@
+from collections import deque
+from functools import partial
+from itertools import islice
+import random
+import tempfile
 from unittest import SkipTest
 from nose.tools import assert_raises
-from six.moves import zip
+from six.moves import cPickle, zip
 from picklable_itertools.extras import (partition, partition_all,
+                                        sliding_window,
                                         IterableLengthMismatch, equizip,
-                                        interleave, roundrobin)
+                                        interleave, roundrobin, shuffle,
+                                        mix, reservoir_sample, shard,
+                                        reshard)
+from picklable_itertools import (
+    iter_, imap, ordered_sequence_iterator, xrange as _xrange, permuted_xrange
+)
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
 
-from . import verify_same, verify_pickle
+from . import verify_same, verify_pickle, old_pickle
 
 
 def test_partition():
@@ -21,6 +33,91 @@ def test_partition():
         yield verify_same, obj, ref, None, 3, [5, 9, 2, 9, 2]
         yield verify_same, obj, ref, None, 3, [5, 9, 2, 9, 2]
         yield verify_pickle, obj, ref, 2, 1, 3, [5, 9, 2, 9, 2, 4, 3]
+        yield verify_same, obj, ref, None, 2, _xrange(7)
+        yield verify_pickle, obj, ref, 2, 0, 2, (5, 9, 2, 9, 2)
+
+
+def test_partition_slicing():
+    it = partition_all(2, iter_([1, 2, 3, 4, 5]))
+    next(it)
+    assert list(it) == [(3, 4), (5,)]
+    assert list(partition(2, 'abcde', pad='')) == [('a', 'b'), ('c', 'd'),
+                                                   ('e', '')]
+    # Iterators over sequences are advanced, as they may be shared.
+    shared = iter(_xrange(10))
+    assert next(partition_all(3, shared)) == (0, 1, 2)
+    assert next(shared) == 3
+    shared = ordered_sequence_iterator('abcdefg')
+    assert next(partition(2, shared)) == ('a', 'b')
+    assert list(shared) == list('cdefg')
+    # Sequences that cannot be sliced are iterated over.
+    assert list(partition_all(2, deque([1, 2, 3]))) == [(1, 2), (3,)]
+    assert list(partition(2, deque('abcde'))) == [('a', 'b'), ('c', 'd')]
+    if not NUMPY_AVAILABLE:
+        raise SkipTest
+    array = numpy.arange(10).reshape(5, 2)
+    it = partition_all(2, array)
+    batch = next(it)
+    assert numpy.shares_memory(batch, array)
+    it = cPickle.loads(cPickle.dumps(it))
+    assert it._position == 2
+    batches = list(it)
+    assert [b.shape for b in batches] == [(2, 2), (1, 2)]
+    assert (batches[1] == [[8, 9]]).all()
+    padded = list(partition(2, numpy.arange(3), pad=-1))
+    assert (padded[0] == [0, 1]).all() and padded[1] == (2, -1)
+
+
+def test_sliding_window():
+    assert list(sliding_window(2, [1, 2, 3, 4])) == [(1, 2), (2, 3), (3, 4)]
+    for make in (lambda: range(10), lambda: iter(range(10)),
+                 lambda: list(range(10))):
+        for n, step in [(1, 1), (3, 1), (3, 2), (2, 4), (10, 1), (11, 1)]:
+            expected = [tuple(range(i, i + n))
+                        for i in range(0, 10 - n + 1, step)]
+            assert list(sliding_window(n, make(), step=step)) == expected
+    shared = ordered_sequence_iterator(list(range(10)))
+    windows = sliding_window(3, shared, step=2)
+    assert [next(windows), next(windows)] == [(0, 1, 2), (2, 3, 4)]
+    assert next(shared) == 5
+    # Sequences that cannot be sliced go through the ring buffer.
+    assert list(sliding_window(2, deque([1, 2, 3]))) == [(1, 2), (2, 3)]
+    windows = sliding_window(3, deque(range(10)), step=2)
+    assert windows._sequence is None
+    assert list(windows) == [(0, 1, 2), (2, 3, 4), (4, 5, 6), (6, 7, 8)]
+    assert_raises(ValueError, sliding_window, 0, [1])
+    assert_raises(ValueError, sliding_window, 2, [1], step=0)
+    assert_raises(ValueError, sliding_window, 2, [1], stride=2)
+
+
+def test_sliding_window_pickle():
+    it = sliding_window(3, iter_(range(10)), step=2)
+    next(it)
+    state = it.__getstate__()
+    assert state['_buffer'] == [0, 1, 2]
+    expected = [(0, 1, 2), (2, 3, 4), (4, 5, 6), (6, 7, 8)]
+    yield (verify_pickle, partial(sliding_window, step=2),
+           lambda *args: iter(expected), 4, 0, 3, iter_(range(10)))
+    # Before the first window, the buffer is still empty.
+    it = cPickle.loads(cPickle.dumps(sliding_window(3, iter_(range(10)))))
+    assert list(it) == [tuple(range(i, i + 3)) for i in range(8)]
+
+
+def test_sliding_window_numpy():
+    if not NUMPY_AVAILABLE:
+        raise SkipTest
+    array = numpy.arange(20).reshape(10, 2)
+    windows = list(sliding_window(4, array, step=3))
+    assert len(windows) == 3
+    assert all(numpy.shares_memory(window, array) for window in windows)
+    batches = list(sliding_window(4, array, step=3, vectorized=True,
+                                  batch_size=2))
+    assert [batch.shape for batch in batches] == [(2, 4, 2), (1, 4, 2)]
+    assert not batches[0].flags.writeable
+    assert (numpy.concatenate(batches) == numpy.stack(windows)).all()
+    vectorized = partial(sliding_window, vectorized=True, batch_size=4)
+    verify_pickle(vectorized, vectorized, 2, 0, 4, array)
+    assert list(sliding_window(11, array, vectorized=True)) == []
 
 
 def test_equizip():
@@ -51,3 +148,239 @@ def test_interleave():
 
     assert (list(interleave(['ABCDEF', stupid_gen()], [StupidException])) ==
             list('AABBCDEF'))
+
+
+def test_interleave_pickling():
+    yield (verify_pickle, interleave,
+           lambda iterables: iter([1, 4, 5, 9, 2, 6, 10, 3, 7, 8]), 10, 2,
+           [[1, 2, 3], (4,), _xrange(5, 9), iter_([9, 10])])
+    yield (verify_pickle, roundrobin, lambda *iterables: iter('ADEBFC'), 6,
+           3, 'ABC', 'D', 'EF')
+    yield (verify_pickle, interleave, lambda iterables: iter([1, 4, 2, 3]),
+           4, 0, [[1, 2, 3], [4]])
+    # Thousands of exhausted inputs must not recurse.
+    assert list(interleave([[]] * 5000 + [[1]])) == [1]
+
+
+def test_interleave_old_pickle():
+    # The state of interleave([[1, 2], [3, 4], [5]], [ValueError]) after
+    # one element, before interleave was rebuilt.
+    iters = imap(iter, [iter_([1, 2]), iter_([3, 4]), iter_([5])])
+    first = next(iters)
+    next(first)
+    state = {'_iters': iters, '_more': [first],
+             '_pass_exceptions': [ValueError]}
+    it = cPickle.loads(old_pickle(interleave, state))
+    assert list(it) == [3, 5, 2, 4]
+    assert ValueError in it._pass_exceptions
+
+
+def test_interleave_weights():
+    it = interleave(['AAAAAAAA', 'BBBB'], weights=[2, 1])
+    assert ''.join(it) == 'AABAABAABAAB'
+    assert (''.join(interleave(['ABCDEF', 'JK', 'GHI', 'L'],
+                               weights=[1, 1, 1, 1])) == 'AJGLBKHCIDEF')
+    it = interleave([_xrange(1000), _xrange(1000, 2000)], weights=[3, 1])
+    head = [next(it) for _ in range(400)]
+    assert sum(value >= 1000 for value in head) == 100
+    weighted = partial(interleave, weights=[3, 1])
+    verify_pickle(weighted, weighted, 2000, 409,
+                  [_xrange(1000), _xrange(1000, 2000)])
+    assert_raises(ValueError, interleave, ['A', 'B'], weights=[1])
+    assert_raises(ValueError, interleave, ['A', 'B'], weights=[1, 0])
+
+
+def test_shuffle():
+    data = list(range(50))
+    for buffer_size in [1, 7, 50, 100]:
+        assert sorted(shuffle(data, buffer_size, seed=3)) == data
+    assert list(shuffle(data, 1, seed=3)) == data
+    assert list(shuffle([], 4)) == []
+    assert list(shuffle(data, 10, 4)) == list(shuffle(data, 10, 4))
+    assert list(shuffle(data, 10, 4)) != list(shuffle(data, 10, 5))
+    assert list(shuffle(data, 10, 4)) == list(shuffle(iter(data), 10,
+                                                      random.Random(4)))
+    assert_raises(ValueError, shuffle, data, 0)
+    for m in [0, 3, 10, 45, 49]:
+        yield verify_pickle, shuffle, shuffle, 50, m, data, 10, 1
+
+
+def test_shuffle_numpy():
+    if not NUMPY_AVAILABLE:
+        raise SkipTest()
+    data = numpy.arange(40).reshape((20, 2))
+    expected = list(shuffle(data.tolist(), 6, seed=2))
+    assert [row.tolist() for row in shuffle(data, 6, seed=2)] == expected
+    yield (verify_pickle, shuffle, lambda *args: iter(expected), 20, 4,
+           data, 6, 2)
+
+    def shuffled(make_seed):
+        # Generators are advanced in place, so each shuffle gets its own.
+        return shuffle(range(30), 8, make_seed(1))
+
+    for make_seed in [numpy.random.RandomState, numpy.random.default_rng]:
+        yield verify_pickle, shuffled, shuffled, 30, 11, make_seed
+        assert sorted(shuffled(make_seed)) == list(range(30))
+
+
+def test_mix():
+    sources = [_xrange(0, 1000), _xrange(1000, 2000), [2000, 2001]]
+    drawn = list(mix(sources, [3, 1, 1], seed=0))
+    assert sorted(drawn) == list(range(2000)) + [2000, 2001]
+    assert drawn == list(mix(sources, [3, 1, 1], seed=0))
+    head = drawn[:400]
+    assert 250 < sum(value < 1000 for value in head) < 350
+    assert [value for value in drawn if value < 1000] == list(range(1000))
+    stopped = list(mix(['ab', 'cde'], seed=1, on_exhaust='stop'))
+    dropped = list(mix(['ab', 'cde'], seed=1))
+    assert len(stopped) < 5 and stopped == dropped[:len(stopped)]
+    restarted = mix(['ab', 'cde', ''], seed=1, on_exhaust='restart')
+    assert set(islice(restarted, 50)) == set('abcde')
+    assert list(mix([], seed=1)) == []
+    # Seeds NumPy does not take fall back to Python's generator.
+    assert sorted(mix(['ab', 'c'], seed=-1)) == ['a', 'b', 'c']
+    assert mix(sources, seed=0)._random._numpy == NUMPY_AVAILABLE
+    assert_raises(ValueError, mix, ['a'], on_exhaust='loop')
+    assert_raises(ValueError, mix, ['a', 'b'], [1])
+    assert_raises(ValueError, mix, ['a', 'b'], [1, -1])
+    mixed = partial(mix, sources, [3, 1, 1], seed=2)
+    for m in [0, 5, 1100]:
+        yield verify_pickle, mixed, mixed, 2002, m
+
+
+def test_mix_resume_restart():
+    def mixed(weights, make_seed):
+        return mix([_xrange(3), 'ab'], weights, make_seed(),
+                   on_exhaust='restart', block_size=7)
+
+    yield verify_pickle, mixed, mixed, 50, 19, None, partial(random.Random, 5)
+    if NUMPY_AVAILABLE:
+        yield (verify_pickle, mixed, mixed, 50, 19, [1, 2],
+               partial(numpy.random.default_rng, 3))
+
+
+def test_reservoir_sample():
+    counts = [0] * 10
+    for seed in range(3000):
+        sample = list(reservoir_sample(range(10), 3, seed=seed))
+        assert len(set(sample)) == 3
+        for value in sample:
+            counts[value] += 1
+    assert all(800 < count < 1000 for count in counts)
+    assert sorted(reservoir_sample('abc', 5, seed=0)) == ['a', 'b', 'c']
+    assert list(reservoir_sample('abc', 0)) == []
+    assert_raises(ValueError, reservoir_sample, 'abc', -1)
+    data = list(range(1000))
+    sample = list(reservoir_sample(data, 4, seed=1))
+    assert sample == list(reservoir_sample(iter(data), 4, seed=1))
+    assert sample == list(reservoir_sample(iter_(data), 4, seed=1))
+    assert sample == list(reservoir_sample(_xrange(1000), 4, seed=1))
+
+
+def test_reservoir_sample_skips():
+    data = list(range(10 ** 6))
+    it = reservoir_sample(data, 5, seed=2)
+    # Far fewer random numbers than elements are drawn.
+    draws = []
+    it._random._rng = _CountingRandom(2, draws)
+    assert len(list(it)) == 5
+    assert len(draws) < 500
+
+
+class _CountingRandom(random.Random):
+    def __init__(self, seed, draws):
+        super(_CountingRandom, self).__init__(seed)
+        self._draws = draws
+
+    def random(self):
+        self._draws.append(None)
+        return super(_CountingRandom, self).random()
+
+
+def test_reservoir_sample_pickle():
+    expected = list(reservoir_sample(_xrange(500), 7, seed=3))
+    it = reservoir_sample(iter_(_xrange(500)), 7, seed=3)
+    steps = 0
+    while it.consume(60):
+        steps += 1
+        it = cPickle.loads(cPickle.dumps(it))
+        assert len(it.sample()) == 7
+    assert steps == 8
+    assert list(it) == expected
+    for m in [0, 3]:
+        yield (verify_pickle, reservoir_sample, reservoir_sample, 7, m,
+               _xrange(500), 7, 3)
+
+
+def verify_shard(make_iterable, num_shards):
+    expected = list(make_iterable())
+    for index in range(num_shards):
+        ref = list(islice(expected, index, None, num_shards))
+        assert list(shard(make_iterable(), num_shards, index)) == ref
+        if ref:
+            verify_pickle(shard, lambda *args: iter(ref), len(ref),
+                          min(1, len(ref) - 1), make_iterable(), num_shards,
+                          index)
+
+
+def test_shard():
+    data = list(range(23))
+    yield verify_shard, lambda: data, 4
+    yield verify_shard, lambda: tuple(data), 1
+    yield verify_shard, lambda: iter_(data), 5
+    yield verify_shard, lambda: _xrange(3, 40, 3), 3
+    yield verify_shard, lambda: iter(_xrange(3, 40, 3)), 3
+    yield verify_shard, lambda: iter(data), 4
+    assert list(shard((x for x in data), 4, 1)) == data[1::4]
+    yield verify_shard, lambda: [], 2
+    yield verify_shard, lambda: permuted_xrange(23, 1), 3
+    if NUMPY_AVAILABLE:
+        yield verify_shard, lambda: numpy.arange(10).tolist(), 3
+    partly_consumed = iter_(data)
+    next(partly_consumed)
+    assert list(shard(partly_consumed, 3, 1)) == data[2::3]
+    # Sequences registered as such can be sliced by the extras.
+    permuted = permuted_xrange(10, 1)
+    assert list(partition_all(3, permuted)) == list(
+        partition_all(3, list(permuted)))
+    assert list(sliding_window(4, permuted)) == list(
+        sliding_window(4, list(permuted)))
+    if NUMPY_AVAILABLE:
+        it = iter(permuted)
+        next(it)
+        assert (list(imap(numpy.negative, it, vectorized=True)) ==
+                [-value for value in list(permuted)[1:]])
+    assert_raises(ValueError, shard, data, 3, 3)
+    assert_raises(ValueError, shard, data, 0, 0)
+
+
+def test_shard_file():
+    f = tempfile.NamedTemporaryFile(mode='w')
+    f.write("".join("{}\n".format(i) for i in range(10)))
+    f.flush()
+    verify_pickle(shard, lambda *args: iter(["2\n", "5\n", "8\n"]), 3, 0,
+                  open(f.name), 3, 2)
+
+
+def verify_reshard(make_iterable, steps):
+    expected = list(make_iterable())
+    shards = [shard(make_iterable(), 3, i) for i in range(3)]
+    for s, n in zip(shards, steps):
+        for _ in range(n):
+            next(s)
+    # The first element not returned by its shard.
+    resumed = min(3 * n + index for index, n in enumerate(steps))
+    new_shards = reshard(shards, 2)
+    for index, s in enumerate(new_shards):
+        assert list(s) == expected[resumed + index::2]
+    assert [list(s) for s in reshard(new_shards, 1)] == [[]]
+
+
+def test_reshard():
+    yield verify_reshard, lambda: list(range(30)), [2, 2, 2]
+    yield verify_reshard, lambda: list(range(30)), [4, 1, 3]
+    yield verify_reshard, lambda: iter(range(30)), [4, 1, 3]
+    yield verify_reshard, lambda: iter(range(30)), [0, 5, 5]
+    shards = [shard(range(5), 2, i) for i in range(2)]
+    assert_raises(ValueError, reshard, shards[:1], 3)
+    assert_raises(ValueError, reshard, shards, 0)
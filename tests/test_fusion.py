@@ -0,0 +1,60 @@
+from nose.tools import assert_raises
+
+from picklable_itertools import (
+    imap, starmap, ifilter, ifilterfalse, izip, iter_, xrange
+)
+from picklable_itertools.extras import fuse
+from picklable_itertools.fusion import fused
+
+from . import verify_pickle
+
+
+def _inc(x):
+    return x + 1
+
+
+def _is_odd(x):
+    return x % 2 == 1
+
+
+def _pair(x):
+    return x, x * 10
+
+
+def _pipelines():
+    yield lambda: imap(_inc, ifilter(_is_odd, imap(_inc, xrange(20))))
+    yield lambda: starmap(max, imap(_pair, ifilterfalse(_is_odd,
+                                                        iter_(range(20)))))
+    yield lambda: ifilter(None, imap(_inc, imap(_inc, [-2, -1, 0, 1])))
+    yield lambda: starmap(max, ifilter(None, izip(xrange(5), xrange(5))))
+
+
+def test_fuse():
+    for make in _pipelines():
+        expected = list(make())
+        it = fuse(make())
+        assert isinstance(it, fused)
+        assert list(it) == expected
+        assert list(fuse(make()).unfuse()) == expected
+        verify_pickle(lambda: fuse(make()), make, len(expected), 1)
+
+
+def test_fuse_boundaries():
+    it = imap(_inc, xrange(3))
+    assert fuse(it) is it
+    it = imap(None, imap(_inc, xrange(3)))
+    assert fuse(it) is it
+    it = imap(_inc, izip(imap(_inc, xrange(3)), imap(_inc, xrange(3))))
+    assert fuse(it) is it
+    source = izip(xrange(3))
+    it = fuse(ifilter(None, imap(_inc, imap(max, source))))
+    assert it._source is source and len(it._stages) == 3
+    it = fuse(imap(_inc, it))
+    assert it._source is source and len(it._stages) == 4
+    assert list(it) == [2, 3, 4]
+
+
+def test_fused():
+    it = fused(xrange(6), [(imap, _inc), (ifilterfalse, _is_odd)])
+    assert list(it) == [2, 4, 6]
+    assert_raises(ValueError, fused, xrange(6), [('map', _inc)])
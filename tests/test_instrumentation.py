@@ -0,0 +1,120 @@
+import gc
+from unittest import SkipTest
+import weakref
+
+from nose.tools import assert_raises
+
+from picklable_itertools import (
+    chain, compress, ifilter, imap, izip_longest, tee
+)
+from picklable_itertools.extras import equizip
+from picklable_itertools.instrumentation import (
+    instrument, enable, disable, get_profile
+)
+
+
+def _slow_identity(x):
+    total = 0
+    for i in range(200):
+        total += i
+    return x
+
+
+def test_instrument_counts():
+    source = chain([0, 1, 2], [3, 0, 5])
+    filtered = ifilter(None, source)
+    mapped = imap(_slow_identity, filtered)
+    with instrument() as profile:
+        assert list(mapped) == [1, 2, 3, 5]
+    assert get_profile() is None
+    mapped_stats = profile.stats(mapped)
+    assert mapped_stats.calls == 5
+    assert mapped_stats.stops == 1
+    assert mapped_stats.items == 4
+    assert profile.stats(filtered).calls == 5
+    assert profile.stats(source).items == 6
+    assert profile.stats(source).stops == 1
+    for stats in profile:
+        assert 0 <= stats.self_time <= stats.total_time
+    assert (mapped_stats.self_time <
+            mapped_stats.total_time - profile.stats(filtered).total_time +
+            1e-6)
+    assert 'imap' in profile.report()
+
+
+def test_instrument_super_calls():
+    zipped = equizip([1, 2], [3, 4])
+    with instrument() as profile:
+        list(zipped)
+    assert len(profile) == 1
+    assert profile.stats(zipped).calls == 3
+
+
+def test_instrument_weak_references():
+    with instrument() as profile:
+        for _ in range(3):
+            assert list(imap(abs, [-1, -2])) == [1, 2]
+        kept = imap(abs, [-3])
+        next(kept)
+        gone = imap(abs, [-4])
+        next(gone)
+    gone = weakref.ref(gone)
+    gc.collect()
+    assert gone() is None
+    assert profile.stats(kept).calls == 1
+    collected = [stats for stats in profile if stats.node is None]
+    assert len(profile) == 2 and len(collected) == 1
+    assert collected[0].name == 'imap (collected)'
+    assert collected[0].calls == 10 and collected[0].items == 7
+    assert 'imap (collected)' in profile.report()
+
+
+def test_instrument_tee():
+    first, second = tee([1, 2, 3])
+    with instrument() as profile:
+        assert list(first) == [1, 2, 3]
+    assert profile.stats(first).items == 3
+    assert profile.stats(second) is None
+
+
+def test_disabled_restores_methods():
+    original = izip_longest.__dict__['__next__']
+    with instrument():
+        assert izip_longest.__dict__['__next__'] is not original
+    assert izip_longest.__dict__['__next__'] is original
+    enable()
+    try:
+        assert_raises(RuntimeError, enable)
+    finally:
+        disable()
+    assert disable() is None
+    assert list(imap(abs, [-1, -2])) == [1, 2]
+
+
+def test_instrument_inherited_next():
+    try:
+        import numpy
+    except ImportError:
+        raise SkipTest
+    from picklable_itertools.simple import _vectorized_compress
+    data = numpy.arange(6)
+    selected = compress(data, data % 2 == 0, vectorized=True)
+    with instrument() as profile:
+        assert list(selected) == [0, 2, 4]
+    assert profile.stats(selected).items == 3
+    assert '__next__' not in _vectorized_compress.__dict__
+
+
+def test_instrument_next_or():
+    parts = [imap(abs, [-1, -2]), imap(abs, [])]
+    chained = chain(*parts)
+    original = chain.__dict__['_next_or']
+    with instrument() as profile:
+        assert chain.__dict__['_next_or'] is not original
+        assert list(chained) == [1, 2]
+    assert chain.__dict__['_next_or'] is original
+    assert profile.stats(parts[0]).calls == 3
+    assert profile.stats(parts[0]).stops == 1
+    assert profile.stats(parts[1]).items == 0
+    assert profile.stats(chained).items == 2
+    assert profile.stats(chained).stops == 1
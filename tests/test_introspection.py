@@ -0,0 +1,85 @@
+from picklable_itertools import chain, ifilter, imap, izip, tee, groupby
+from picklable_itertools import xrange as _xrange
+from picklable_itertools.extras import interleave
+from picklable_itertools.instrumentation import instrument, get_profile
+from picklable_itertools.introspection import describe
+
+
+def _slow_identity(x):
+    total = 0
+    for i in range(2000):
+        total += i
+    return x
+
+
+def test_describe_structure():
+    first, second = tee(_xrange(50))
+    pipeline = izip(imap(_slow_identity, first), ifilter(None, second))
+    graph = describe(pipeline)
+    labels = [node.label for node in graph.nodes]
+    assert labels == ['imap', 'imap(_slow_identity)', 'tee_iterator',
+                      'tee_manager', 'range_iterator', 'ifilter',
+                      'tee_iterator']
+    assert graph.root.node is pipeline
+    assert graph.nodes[6].children == [graph.nodes[3]]
+    text = graph.text()
+    assert text.count('tee_manager') == 2
+    assert 'shared' in text
+    dot = graph.dot()
+    assert dot.startswith('digraph')
+    assert 'n3 -> n2;' in dot and 'n3 -> n6;' in dot
+    assert graph.bottleneck() is None
+
+
+def test_describe_groups():
+    grouped = groupby([1, 1, 2])
+    _, group = next(grouped)
+    graph = describe(group)
+    labels = [node.label for node in graph.nodes]
+    assert labels[:2] == ['_grouper', 'groupby'] and len(labels) == 3
+    assert graph.nodes[1].node is grouped
+    assert len(describe(grouped).nodes) == 2
+
+
+def test_describe_sample():
+    first, second = tee(_xrange(200))
+    pipeline = izip(imap(_slow_identity, first), ifilter(None, second))
+    graph = describe(pipeline, sample=50)
+    assert next(pipeline) == (0, 1)
+    assert graph.bottleneck().label == 'imap(_slow_identity)'
+    assert graph.root.stats.items == 50
+    assert sum(node.time_fraction for node in graph.nodes
+               if node.stats is not None) <= 1.0 + 1e-6
+    assert 'items/s' in graph.text()
+    assert 'of time' in graph.dot()
+
+
+def test_describe_profile():
+    pipeline = imap(_slow_identity, chain([1, 2], [3]))
+    with instrument() as profile:
+        list(pipeline)
+    graph = describe(pipeline, profile=profile)
+    assert graph.root.stats.items == 3
+    assert graph.bottleneck() is graph.root
+
+
+def test_describe_sample_while_instrumented():
+    with instrument() as outer:
+        pipeline = imap(_slow_identity, chain([1, 2], [3]))
+        graph = describe(pipeline, sample=2)
+        assert get_profile() is outer
+        assert graph.root.stats.items == 2
+        assert outer.stats(pipeline) is None
+        assert list(pipeline) == [1, 2, 3]
+    assert outer.stats(pipeline).items == 3
+
+
+def test_describe_interleave():
+    for weights in (None, [1, 2]):
+        pipeline = interleave([chain([1, 2], [3]), chain(_xrange(10))],
+                              weights=weights)
+        next(pipeline)
+        graph = describe(pipeline, sample=4)
+        chains = [node for node in graph.nodes if node.label == 'chain']
+        assert len(chains) == 2
+        assert sum(node.stats.items for node in chains) == 4
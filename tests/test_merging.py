@@ -0,0 +1,161 @@
+from functools import partial
+import heapq
+import os
+import random
+import shutil
+import tempfile
+
+from nose.tools import assert_raises
+from six.moves import cPickle
+
+from picklable_itertools import iter_, xrange as _xrange
+from picklable_itertools.extras import merge, external_sorted, merge_join
+from picklable_itertools.iter_dispatch import numpy, NUMPY_AVAILABLE
+
+from . import verify_same, verify_pickle
+
+
+def _sorted_lists(seed, k, n, reverse=False):
+    rng = random.Random(seed)
+    return [sorted((rng.randrange(n) for _ in range(rng.randrange(n))),
+                   reverse=reverse) for _ in range(k)]
+
+
+def _first(pair):
+    return pair[0]
+
+
+def _negative(x):
+    return -x
+
+
+class _Tagged(object):
+    """Compares by value only, to check that merging is stable."""
+    def __init__(self, value, tag):
+        self.value = value
+        self.tag = tag
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+    def __le__(self, other):
+        return self.value <= other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def test_merge():
+    inputs = _sorted_lists(0, 5, 40)
+    yield (verify_same, merge, heapq.merge, None) + tuple(inputs)
+    yield verify_same, merge, heapq.merge, None
+    yield verify_same, merge, heapq.merge, None, [], [1, 3], []
+    yield verify_same, merge, heapq.merge, None, _xrange(0, 50, 3), [4, 49]
+    for m in (0, 1, 17, 60):
+        yield (verify_pickle, merge, heapq.merge, 61, m) + tuple(inputs)
+    assert_raises(ValueError, merge, [1], keyfunc=abs)
+
+
+def test_merge_key_reverse():
+    inputs = _sorted_lists(1, 4, 30, reverse=True)
+    assert list(merge(*inputs, reverse=True)) == list(
+        heapq.merge(*inputs, reverse=True))
+    pairs = [sorted((value, i) for value in values)
+             for i, values in enumerate(_sorted_lists(2, 4, 20))]
+    for reverse in (False, True):
+        if reverse:
+            pairs = [pair[::-1] for pair in pairs]
+        n = sum(len(pair) for pair in pairs)
+        yield ((verify_pickle, partial(merge, key=_first, reverse=reverse),
+                partial(heapq.merge, key=_first, reverse=reverse), n, 9) +
+               tuple(pairs))
+
+
+def test_merge_runs():
+    first = [_Tagged(v, 'a') for v in (1, 1, 2, 2, 5)]
+    second = [_Tagged(v, 'b') for v in (1, 2, 3)]
+    for inputs in ([first, second], [second, first]):
+        assert ([x.tag for x in merge(*inputs)] ==
+                [x.tag for x in heapq.merge(*inputs)])
+    runs = [list(range(i * 100, (i + 1) * 100)) for i in range(5)]
+    it = merge(*runs[::-1])
+    for _ in range(150):
+        next(it)
+    assert it._run > 0
+    verify_pickle(merge, heapq.merge, 500, 149, *runs[::-1])
+    it = merge(iter_([5, 6, 7]), [1, 2, 3, 8])
+    assert list(it) == [1, 2, 3, 5, 6, 7, 8]
+    if NUMPY_AVAILABLE:
+        arrays = [numpy.sort(numpy.array(values))
+                  for values in _sorted_lists(3, 3, 30)]
+        assert list(merge(*arrays)) == list(heapq.merge(*arrays))
+
+
+def test_external_sorted():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        rng = random.Random(4)
+        values = [rng.randrange(100) for _ in range(250)]
+        it = external_sorted(values, run_size=40, tmpdir=tmpdir)
+        assert list(it) == sorted(values)
+        assert os.listdir(tmpdir) == []
+        it = external_sorted(iter_(values), key=_negative, run_size=30,
+                             tmpdir=tmpdir, reverse=True)
+        assert list(it) == sorted(values, key=_negative, reverse=True)
+        pairs = [(value % 7, i) for i, value in enumerate(values)]
+        it = external_sorted(pairs, key=_first, run_size=16, tmpdir=tmpdir)
+        assert list(it) == sorted(pairs, key=_first)
+        assert list(external_sorted([], tmpdir=tmpdir)) == []
+        assert os.listdir(tmpdir) == []
+        assert_raises(ValueError, external_sorted, values, run_size=0)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_external_sorted_resume():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        values = list(_xrange(100, 0, -1))
+        it = external_sorted(iter_(values), run_size=30, tmpdir=tmpdir)
+        assert it.write_run() and it.write_run()
+        checkpoint = cPickle.dumps(it)
+        assert len(os.listdir(tmpdir)) == 2
+        it = cPickle.loads(checkpoint)
+        head = [next(it) for _ in range(45)]
+        assert len(os.listdir(tmpdir)) == 4
+        assert not it.write_run()
+        checkpoint = cPickle.dumps(it)
+        assert head + list(cPickle.loads(checkpoint)) == list(range(1, 101))
+        assert os.listdir(tmpdir) == []
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def _join_reference(left, right, key, how):
+    pairs = [(a, b) for a in left for b in right if key(a) == key(b)]
+    if how in ('left', 'outer'):
+        pairs += [(a, None) for a in left
+                  if not any(key(a) == key(b) for b in right)]
+    if how in ('right', 'outer'):
+        pairs += [(None, b) for b in right
+                  if not any(key(a) == key(b) for a in left)]
+    return sorted(pairs, key=lambda pair: key(pair[0] if pair[0] is not None
+                                              else pair[1]))
+
+
+def test_merge_join():
+    left = [(1, 'a'), (2, 'b'), (2, 'c'), (4, 'd'), (7, 'e')]
+    right = [(0, 'x'), (2, 'y'), (2, 'z'), (4, 'w'), (8, 'v'), (9, 'u')]
+    for how in ('inner', 'left', 'right', 'outer'):
+        joined = list(merge_join(left, right, _first, how=how))
+        assert joined == _join_reference(left, right, _first, how)
+        for m in range(len(joined) - 1):
+            verify_pickle(partial(merge_join, how=how),
+                          lambda *args: iter(joined), len(joined), m,
+                          iter_(left), iter_(right), _first)
+    assert list(merge_join([1, 2, 3], [3, 4])) == [(3, 3)]
+    assert list(merge_join([], [1], how='outer')) == [(None, 1)]
+    assert (list(merge_join(['a', 'bb'], [1, 2], len, lambda x: x)) ==
+            [('a', 1), ('bb', 2)])
+    assert_raises(ValueError, list, merge_join([2, 1], [1, 2]))
+    assert_raises(ValueError, merge_join, [1], [1], how='cross')
@@ -0,0 +1,67 @@
+from functools import partial
+import random
+
+from nose.tools import assert_raises
+from six.moves import cPickle
+
+from picklable_itertools import iter_
+from picklable_itertools.extras import unique
+
+from . import verify_pickle
+
+
+def test_unique():
+    data = [3, 1, 3, 2, 1, 4, 2]
+    assert list(unique(data)) == [3, 1, 2, 4]
+    assert list(unique(data, mode='lru', capacity=10)) == [3, 1, 2, 4]
+    assert list(unique(data, mode='bloom', capacity=10)) == [3, 1, 2, 4]
+    words = ['a', 'B', 'b', 'A', 'c']
+    assert list(unique(words, key=str.lower)) == ['a', 'B', 'c']
+    assert list(unique([])) == []
+    # Equal numbers are duplicates in every mode.
+    numbers = [1, 1.0, True, 2, (2, 1.0), (2.0, True), -1, -2, 0.5]
+    expected = [1, 2, (2, 1.0), -1, -2, 0.5]
+    assert list(unique(numbers)) == expected
+    assert list(unique(numbers, mode='lru', capacity=10)) == expected
+    assert list(unique(numbers, mode='bloom', capacity=10)) == expected
+    assert_raises(ValueError, unique, data, mode='fuzzy')
+    assert_raises(ValueError, unique, data, mode='lru')
+    assert_raises(ValueError, unique, data, mode='lru', capacity=0)
+    assert_raises(ValueError, unique, data, mode='bloom', capacity=10,
+                  error_rate=1)
+
+
+def test_unique_lru():
+    data = [1, 2, 1, 3, 4, 1, 2, 4]
+    # 1 is recently seen again at index 2, so it is still remembered.
+    assert list(unique(data, mode='lru', capacity=3)) == [1, 2, 3, 4, 2]
+    assert list(unique(data, mode='lru', capacity=1)) == [1, 2, 1, 3, 4, 1,
+                                                          2, 4]
+
+
+def test_unique_bloom():
+    rng = random.Random(1)
+    data = [rng.randrange(2000) for _ in range(6000)]
+    result = list(unique(data, mode='bloom', capacity=2000, error_rate=0.01))
+    distinct = set(data)
+    assert len(result) == len(set(result))
+    assert set(result) <= distinct
+    assert len(result) > 0.97 * len(distinct)
+
+
+def test_unique_pickle():
+    data = [5, 3, 5, 1, 3, 7, 1, 9, 5]
+    for kwargs in [{}, {'mode': 'lru', 'capacity': 2},
+                   {'mode': 'bloom', 'capacity': 100}]:
+        deduplicated = partial(unique, **kwargs)
+        yield (verify_pickle, deduplicated, deduplicated,
+               len(list(deduplicated(data))), 1, data)
+
+
+def test_unique_bloom_state_size():
+    it = unique(iter_(range(10000)), mode='bloom', capacity=10000,
+                error_rate=0.01)
+    for _ in range(5000):
+        next(it)
+    # About 9.6 bits per key, however many were seen.
+    assert len(cPickle.dumps(it, cPickle.HIGHEST_PROTOCOL)) < 13000